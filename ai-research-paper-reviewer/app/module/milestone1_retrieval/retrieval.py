@@ -1,9 +1,18 @@
 import os
+import sys
 import json
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+# Shared helpers (pdf_cache, s2_client, ...) live at the repository root
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from pdf_cache import PdfCache, InvalidPdfError, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DEFAULT_MAX_PDF_BYTES
+from s2_client import get_client
+import profiling
+
 # =========================
 # ENV + CONFIG
 # =========================
@@ -13,80 +22,80 @@ API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
 if not API_KEY:
     raise RuntimeError("Semantic Scholar API key not found in .env")
 
-BASE_URL = "https://api.semanticscholar.org/graph/v1"
-HEADERS = {"x-api-key": API_KEY}
-
 SAVE_DIR = "papers"
 META_FILE = "papers_metadata.json"
 
 os.makedirs(SAVE_DIR, exist_ok=True)
 
+PDF_CACHE = PdfCache(
+    os.getenv("PDF_CACHE_DIR", DEFAULT_CACHE_DIR),
+    int(os.getenv("PDF_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+    int(os.getenv("PDF_MAX_DOWNLOAD_MB", DEFAULT_MAX_PDF_BYTES // (1024 * 1024))) * 1024 * 1024
+)
+
 # =========================
 # PAPER SEARCH
 # =========================
 def search_papers(topic, limit=5):
     print(f"[INFO] Searching papers for topic: {topic}")
 
-    url = f"{BASE_URL}/paper/search"
-    params = {
-        "query": topic,
-        "limit": limit,
-        "fields": "title,authors,year,openAccessPdf"
-    }
-
-    response = requests.get(url, headers=HEADERS, params=params)
-    response.raise_for_status()
-
-    return response.json().get("data", [])
+    # Pooled session, API-key rate limiting and 429 backoff
+    return get_client().search(topic, limit=limit, fields="title,authors,year,openAccessPdf")
 
 # =========================
 # PDF DOWNLOAD
 # =========================
-def download_pdf(pdf_url, filename):
-    response = requests.get(pdf_url, stream=True)
-    response.raise_for_status()
-
-    with open(filename, "wb") as f:
-        for chunk in response.iter_content(chunk_size=1024):
-            f.write(chunk)
+def download_pdf(pdf_url, filename, paper_id=None):
+    # Cached by paperId + content hash; unchanged PDFs are not downloaded again
+    cached = PDF_CACHE.fetch(paper_id, pdf_url)
+    PDF_CACHE.materialize(cached, filename)
 
 # =========================
 # PIPELINE
 # =========================
-def run_milestone_1(topic, limit=5):
-    papers = search_papers(topic, limit)
-    metadata = []
-
-    for idx, paper in enumerate(papers, start=1):
-        pdf_info = paper.get("openAccessPdf")
-        if not pdf_info or not pdf_info.get("url"):
-            print(f"[SKIP] No PDF available: {paper.get('title')}")
-            continue
-
-        pdf_url = pdf_info["url"]
-        filename = f"{SAVE_DIR}/paper_{idx}.pdf"
-
-        print(f"[DOWNLOAD] {paper.get('title')}")
-        download_pdf(pdf_url, filename)
+def fetch_paper(idx, paper):
+    pdf_info = paper.get("openAccessPdf")
+    if not pdf_info or not pdf_info.get("url"):
+        print(f"[SKIP] No PDF available: {paper.get('title')}")
+        return None
+
+    pdf_url = pdf_info["url"]
+    filename = f"{SAVE_DIR}/paper_{idx}.pdf"
+
+    print(f"[DOWNLOAD] {paper.get('title')}")
+    try:
+        download_pdf(pdf_url, filename, paper.get("paperId"))
+    except InvalidPdfError as e:
+        print(f"[SKIP] {e}: {paper.get('title')}")
+        return None
+
+    return {
+        "title": paper.get("title"),
+        "authors": [a["name"] for a in paper.get("authors", [])],
+        "year": paper.get("year"),
+        "pdf_path": filename
+    }
 
-        metadata.append({
-            "title": paper.get("title"),
-            "authors": [a["name"] for a in paper.get("authors", [])],
-            "year": paper.get("year"),
-            "pdf_path": filename
-        })
+def run_milestone_1(topic, limit=5, workers=1):
+    papers = search_papers(topic, limit)
 
-        time.sleep(1)  # polite API usage
+    # Papers are independent; metadata keeps search order either way
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(fetch_paper, range(1, len(papers) + 1), papers))
+    metadata = [m for m in results if m]
 
     with open(META_FILE, "w", encoding="utf-8") as f:
         json.dump(metadata, f, indent=2)
 
     print(f"\n[SUCCESS] Downloaded {len(metadata)} papers")
+    print(f"[CACHE] {PDF_CACHE.hits} cache hits, {PDF_CACHE.downloads} downloads")
     print(f"[DATASET] Metadata saved to {META_FILE}")
 
 # =========================
 # ENTRY POINT
 # =========================
 if __name__ == "__main__":
+    # --profile[=trace.json] reports search / download timings on exit
+    profiling.start_from_argv()
     topic_input = input("Enter research topic: ")
     run_milestone_1(topic_input, limit=5)
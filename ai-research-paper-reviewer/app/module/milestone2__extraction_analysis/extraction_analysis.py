@@ -1,7 +1,20 @@
 import os
+import re
+import sys
 import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
 
+# Shared helpers (extraction_manifest, ...) live at the repository root
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from extraction_manifest import ExtractionManifest
+import profiling
+
 # =========================
 # CONFIG
 # =========================
@@ -10,104 +23,252 @@ OUTPUT_DIR = "extracted_data"
 SECTION_FILE = "section_wise_text.json"
 KEY_FILE = "key_findings.json"
 
+# PDFs longer than this are split into page ranges across workers
+PAGES_PER_TASK = 40
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Unchanged PDFs reuse stored results; bump the suffix whenever text
+# extraction, section splitting or key-finding logic changes
+MANIFEST_DIR = os.path.join(OUTPUT_DIR, ".manifest")
+EXTRACTOR_VERSION = f"pymupdf-{fitz.VersionBind}/m2-4"
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # =========================
 # PDF TEXT EXTRACTION
 # =========================
 def extract_text_from_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = ""
+    with fitz.open(pdf_path) as doc:
+        return "".join(page.get_text() for page in doc).strip()
+
+def count_pages(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+def extract_page_range(pdf_path, start, stop):
+    with fitz.open(pdf_path) as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+def extract_all_pages(paths, workers=1):
+    """
+    Extract page text for every PDF, splitting work by file and by
+    PAGES_PER_TASK page ranges. Returns {path: [page_text, ...]} with pages
+    in document order regardless of which worker handled them.
+    """
+    tasks = []
+    for path in paths:
+        n_pages = count_pages(path)
+        for start in range(0, n_pages, PAGES_PER_TASK):
+            tasks.append((path, start, min(start + PAGES_PER_TASK, n_pages)))
+
+    task_paths = [t[0] for t in tasks]
+    starts = [t[1] for t in tasks]
+    stops = [t[2] for t in tasks]
 
-    for page in doc:
-        text += page.get_text()
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(extract_page_range, task_paths, starts, stops))
+    else:
+        chunks = list(map(extract_page_range, task_paths, starts, stops))
 
-    return text.strip()
+    pages = {path: [] for path in paths}
+    for path, chunk in zip(task_paths, chunks):
+        pages[path].extend(chunk)
+    return pages
 
 # =========================
 # SECTION SPLITTING (RULE BASED)
 # =========================
-def split_into_sections(text):
-    sections = {
-        "introduction": "",
-        "methodology": "",
-        "results": "",
-        "conclusion": ""
-    }
+SECTION_NAMES = ["introduction", "methodology", "results", "conclusion"]
 
-    lower_text = text.lower()
+# One alternation over whole heading lines ("2. Methods", "III RESULTS",
+# "Materials and Methods"), so body text mentioning "method" never matches.
+# The "end" group only closes the previous section.
+SECTION_HEADING_RE = re.compile(
+    r"^[ \t]*(?:(?:\d+(?:\.\d+)*|[IVXLC]+)\.?[ \t]+)?"
+    r"(?:"
+    r"(?P<introduction>introduction)"
+    r"|(?P<methodology>materials and methods|methodology|methods?)"
+    r"|(?P<results>results?|experiments|evaluation)"
+    r"|(?P<conclusion>conclusions?|discussion|concluding remarks)"
+    r"|(?P<end>references|bibliography|acknowledge?ments?|appendix|related work|background)"
+    r")"
+    r"(?:[ \t]+(?:and|&)[ \t]+[^\n]{1,40})?[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE
+)
 
-    def get_section(start_keywords, end_keywords):
-        for start in start_keywords:
-            if start in lower_text:
-                start_idx = lower_text.find(start)
-                for end in end_keywords:
-                    end_idx = lower_text.find(end, start_idx + 50)
-                    if end_idx != -1:
-                        return text[start_idx:end_idx]
-        return ""
+def find_section_spans(text):
+    """
+    Single linear scan over heading lines. Returns {section: (start, end)}
+    offsets into text; each section runs from the first heading of its kind
+    to the next recognised heading.
+    """
+    spans = {}
+    current, start = None, 0
 
-    sections["introduction"] = get_section(
-        ["introduction"],
-        ["method", "methodology"]
-    )
+    for match in SECTION_HEADING_RE.finditer(text):
+        if current:
+            spans[current] = (start, match.start())
+            current = None
 
-    sections["methodology"] = get_section(
-        ["method", "methodology"],
-        ["result", "results"]
-    )
+        name = match.lastgroup
+        if name != "end" and name not in spans:
+            current, start = name, match.start()
 
-    sections["results"] = get_section(
-        ["result", "results"],
-        ["conclusion", "discussion"]
-    )
+    if current:
+        spans[current] = (start, len(text))
 
-    sections["conclusion"] = get_section(
-        ["conclusion", "discussion"],
-        []
-    )
+    return spans
 
-    return sections
+def split_into_sections(text):
+    spans = find_section_spans(text)
+    return {
+        name: text[spans[name][0]:spans[name][1]] if name in spans else ""
+        for name in SECTION_NAMES
+    }
 
 # =========================
 # KEY FINDINGS EXTRACTION
 # =========================
-def extract_key_findings(results_text):
-    findings = []
-    sentences = results_text.split(".")
+DEFAULT_TOP_K = 5
+
+# Sentence ends are . ! ? followed by whitespace and a capital, digit or
+# opening bracket / quote. Decimals ("0.95") never match; known
+# abbreviations are excluded by the fixed-width lookbehinds (a lone capital
+# is not, so "... than model B. We ..." still splits).
+SENTENCE_SPLIT_RE = re.compile(
+    r"(?<!\bet al\.)(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\bvs\.)(?<!\bcf\.)"
+    r"(?<!\b[Ff]ig\.)(?<!\b[Ff]igs\.)(?<!\b[Ee]q\.)(?<!\b[Ee]qs\.)(?<!\b[Tt]ab\.)"
+    r"(?<!\b[Ss]ec\.)(?<!\bNo\.)(?<!\bapprox\.)(?<!\bresp\.)(?<!\bpp\.)"
+    r"(?<!\bDr\.)(?<!\bProf\.)(?<!\bMr\.)(?<!\bMs\.)"
+    r"(?<=[.!?])\s+(?=[A-Z0-9(\[\"'])"
+)
+
+# All cue words in one alternation; the matched stem, with hyphens and
+# spaces folded to single spaces, picks the weight
+CUE_RE = re.compile(
+    r"\b(outperform|state[- ]of[- ]the[- ]art|significant|improve|increase|"
+    r"better|surpass|reduce|achieve|higher|lower|gain)\w*",
+    re.IGNORECASE
+)
+CUE_SEPARATOR_RE = re.compile(r"[- ]+")
+CUE_WEIGHTS = {
+    "outperform": 3.0, "state of the art": 2.5,
+    "significant": 2.5, "surpass": 2.5, "improve": 2.0, "increase": 1.5,
+    "better": 1.5, "reduce": 1.5, "achieve": 1.0, "higher": 1.0,
+    "lower": 1.0, "gain": 1.0
+}
 
-    for sentence in sentences:
-        s = sentence.strip()
-        if any(word in s.lower() for word in ["improve", "increase", "outperform", "better", "significant"]):
-            findings.append(s)
+# Percentages, decimals, p-values and "2.5x"-style speedups
+NUMERIC_RE = re.compile(
+    r"\d+(?:\.\d+)?\s*%|\bp\s*[<=]\s*0?\.\d+|\b\d+(?:\.\d+)?\s*(?:x|×|times)\b|\b\d+\.\d+\b"
+)
+NUMERIC_WEIGHT = 1.0
+MAX_NUMERIC_BONUS = 3.0
+MIN_WORDS, MAX_WORDS = 6, 60
 
-    return findings[:5]  # keep it tight
+def split_sentences(text):
+    # Re-join words hyphenated across PDF line breaks, then flatten whitespace
+    text = " ".join(re.sub(r"-\n(?=[a-z])", "", text).split())
+    return [s for s in SENTENCE_SPLIT_RE.split(text) if s]
+
+def cue_stem(match):
+    return CUE_SEPARATOR_RE.sub(" ", match.group(1).lower())
+
+def score_sentence(sentence):
+    cues = {cue_stem(m) for m in CUE_RE.finditer(sentence)}
+    if not cues:
+        return 0.0
+
+    score = sum(CUE_WEIGHTS[c] for c in cues)
+    score += min(MAX_NUMERIC_BONUS, NUMERIC_WEIGHT * len(NUMERIC_RE.findall(sentence)))
+
+    n_words = sentence.count(" ") + 1
+    if n_words < MIN_WORDS or n_words > MAX_WORDS:
+        score /= 2
+    return score
+
+def extract_key_findings_batch(results_texts, top_k=DEFAULT_TOP_K):
+    """
+    Key findings for many results sections in one call: every sentence with
+    a cue word is scored by cue strength plus numeric evidence, and the top_k
+    per text are returned best first (ties keep document order).
+    """
+    findings = []
+    for text in results_texts:
+        scored = [(score_sentence(s), i, s) for i, s in enumerate(split_sentences(text))]
+        best = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))
+        findings.append([s.rstrip(".") for _, _, s in best[:top_k]])
+    return findings
+
+def extract_key_findings(results_text, top_k=DEFAULT_TOP_K):
+    return extract_key_findings_batch([results_text], top_k)[0]
 
 # =========================
 # PIPELINE
 # =========================
-def run_milestone_2():
+def run_milestone_2(workers=1, top_k=DEFAULT_TOP_K, paths=None):
+    """
+    Extract sections and key findings for `paths` (default: every PDF in
+    PDF_DIR). Outputs are keyed by file name.
+    """
     section_dataset = {}
     key_findings_dataset = {}
 
-    pdf_files = [f for f in os.listdir(PDF_DIR) if f.endswith(".pdf")]
+    if paths is None:
+        paths = [os.path.join(PDF_DIR, f) for f in sorted(os.listdir(PDF_DIR)) if f.endswith(".pdf")]
 
-    if not pdf_files:
+    if not paths:
         raise RuntimeError("No PDFs found. Run Milestone 1 first.")
 
-    for pdf in pdf_files:
-        print(f"[PROCESSING] {pdf}")
-        path = os.path.join(PDF_DIR, pdf)
+    pdf_files = [os.path.basename(path) for path in paths]
 
-        raw_text = extract_text_from_pdf(path)
-        if len(raw_text) < 500:
-            print(f"[WARNING] Low text extracted from {pdf}")
+    # Stored findings depend on top_k as well
+    manifest = ExtractionManifest(MANIFEST_DIR, f"{EXTRACTOR_VERSION}/top{top_k}")
+    stored = {path: manifest.lookup(path) for path in paths}
+    changed = [path for path in paths if stored[path] is None]
+    print(f"[CACHE] {len(paths) - len(changed)} unchanged, {len(changed)} new or changed PDFs")
 
-        sections = split_into_sections(raw_text)
-        findings = extract_key_findings(sections.get("results", ""))
+    pages = {}
+    if changed:
+        print(f"[INFO] Extracting {len(changed)} PDFs with {workers} worker(s)...")
+        started = time.perf_counter()
+        with profiling.span("extract", bytes=sum(os.path.getsize(p) for p in changed)):
+            pages = extract_all_pages(changed, workers)
+        elapsed = time.perf_counter() - started
 
-        section_dataset[pdf] = sections
-        key_findings_dataset[pdf] = findings
+        total_pages = sum(len(p) for p in pages.values())
+        print(f"[PERF] {total_pages} pages in {elapsed:.2f}s "
+              f"({total_pages / max(elapsed, 1e-9):.1f} pages/sec)")
+
+    new_sections = {}
+    for pdf, path in zip(pdf_files, paths):
+        if stored[path] is None:
+            print(f"[PROCESSING] {pdf}")
+
+            raw_text = "".join(pages[path]).strip()
+            if len(raw_text) < 500:
+                print(f"[WARNING] Low text extracted from {pdf}")
+
+            with profiling.span("segment", bytes=len(raw_text)):
+                new_sections[path] = split_into_sections(raw_text)
+
+    # Key findings for all new results sections in one batch
+    with profiling.span("findings"):
+        new_findings = extract_key_findings_batch(
+            [sections.get("results", "") for sections in new_sections.values()], top_k
+        )
+    for (path, sections), findings in zip(new_sections.items(), new_findings):
+        stored[path] = {"sections": sections, "findings": findings}
+        manifest.record(path, stored[path])
+
+    for pdf, path in zip(pdf_files, paths):
+        result = stored[path]
+        section_dataset[pdf] = result["sections"]
+        key_findings_dataset[pdf] = result["findings"]
+
+    manifest.prune(paths)
+    manifest.save()
 
     # Save outputs
     with open(os.path.join(OUTPUT_DIR, SECTION_FILE), "w", encoding="utf-8") as f:
@@ -123,4 +284,15 @@ def run_milestone_2():
 # ENTRY POINT
 # =========================
 if __name__ == "__main__":
-    run_milestone_2()
+    parser = argparse.ArgumentParser(description="Milestone 2: text extraction & analysis")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="extraction processes (1 = run in this process)")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K,
+                        help="key findings kept per paper")
+    parser.add_argument("--profile", nargs="?", const=profiling.DEFAULT_TRACE_FILE, metavar="TRACE",
+                        help="record stage timings and write a Chrome trace (default: %(const)s)")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiling.start(args.profile)
+    run_milestone_2(workers=max(1, args.workers), top_k=max(1, args.top_k))
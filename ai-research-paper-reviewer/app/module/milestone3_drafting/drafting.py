@@ -1,6 +1,15 @@
 import os
+import sys
 import json
-from transformers import pipeline
+
+# Shared helpers (text_generation, ...) live at the repository root
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from text_generation import GenerationCache, generate_batch, count_tokens, map_reduce
+from model_registry import get_generator as get_shared_generator, get_tokenizer
+import profiling
 
 # =========================
 # CONFIG
@@ -13,6 +22,21 @@ OUTPUT_DIR = "draft_output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 MODEL_NAME = "google/flan-t5-base"
+GENERATION_PARAMS = {"max_length": 512}
+BATCH_SIZE = 8
+
+# flan-t5 silently truncates longer inputs, so longer material is
+# summarised in chunks (map-reduce) until the final prompt fits
+MAX_INPUT_TOKENS = 512
+
+# Set DRAFT_RETRIEVAL_K > 0 to build the Methods prompt from the top-k most
+# relevant methodology chunks in the local vector index instead of all papers
+RETRIEVAL_K = int(os.getenv("DRAFT_RETRIEVAL_K", "0"))
+RETRIEVAL_COLLECTION = "extracted_sections"
+METHODS_QUERY = "research methodology, experimental setup and approach"
+
+# Generated text is cached per model, params and prompt hash
+CACHE_DIR = os.path.join(OUTPUT_DIR, ".generation_cache")
 
 # =========================
 # LOAD DATA
@@ -21,18 +45,49 @@ def load_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-sections = load_json(os.path.join(EXTRACTED_DIR, SECTION_FILE))
-findings = load_json(os.path.join(EXTRACTED_DIR, FINDINGS_FILE))
+def load_inputs():
+    sections = load_json(os.path.join(EXTRACTED_DIR, SECTION_FILE))
+    findings = load_json(os.path.join(EXTRACTED_DIR, FINDINGS_FILE))
+    return sections, findings
 
 # =========================
 # LOAD MODEL
 # =========================
-print("[INFO] Loading Hugging Face model...")
-generator = pipeline(
-    "text2text-generation",
-    model=MODEL_NAME,
-    max_length=512
-)
+def get_generator():
+    # Loaded on first cache miss and shared process-wide (or served by
+    # model_server.py when MODEL_SERVER_URL is set)
+    return get_shared_generator("text2text-generation", MODEL_NAME, **GENERATION_PARAMS)
+
+generation_cache = GenerationCache(CACHE_DIR, MODEL_NAME, GENERATION_PARAMS)
+
+def generate_texts(prompts):
+    return generate_batch(get_generator, prompts, cache=generation_cache, batch_size=BATCH_SIZE)
+
+def condense(text, map_prompt, *final_prompts):
+    # The result is cached under the whole request, so a cached rerun
+    # answers it without loading the tokenizer
+    request = json.dumps({
+        "condense": text,
+        "map_prompt": map_prompt(""),
+        "final_prompts": [p("") for p in final_prompts],
+        "max_input_tokens": MAX_INPUT_TOKENS
+    }, ensure_ascii=False)
+    condensed = generation_cache.get(request)
+    if condensed is not None:
+        return condensed
+
+    # Room left for `text` in the largest of the final prompts
+    tokenizer = get_tokenizer(MODEL_NAME)
+    overhead = max(count_tokens(tokenizer, [p("") for p in final_prompts]))
+    condensed = map_reduce(
+        get_generator, tokenizer, text, map_prompt,
+        budget=MAX_INPUT_TOKENS - overhead,
+        max_input_tokens=MAX_INPUT_TOKENS,
+        cache=generation_cache,
+        batch_size=BATCH_SIZE
+    )
+    generation_cache.put(request, condensed)
+    return condensed
 
 # =========================
 # SYNTHESIS
@@ -41,39 +96,78 @@ def synthesize_findings(findings_dict):
     merged = []
     for paper, points in findings_dict.items():
         merged.extend(points)
-    return "\n".join(set(merged))
+    # Ordered de-duplication keeps the prompt (and its cache key) stable across runs
+    return "\n".join(dict.fromkeys(merged))
+
+def collect_methods(sections_dict):
+    return "\n".join(
+        sec["methodology"] for sec in sections_dict.values()
+        if sec.get("methodology")
+    )
+
+def retrieve_methods(sections_dict, k=RETRIEVAL_K):
+    from vector_index import SectionIndex
+
+    index = SectionIndex(collection=RETRIEVAL_COLLECTION)
+    index.index_papers([
+        {"pdf_file": pdf, "title": pdf, "sections": secs}
+        for pdf, secs in sections_dict.items()
+    ])
+    hits = index.query(METHODS_QUERY, k=k, where={"section": "methodology"})
+    return "\n".join(hit["text"] for hit in hits)
 
 # =========================
-# DRAFT GENERATORS
+# PROMPT BUILDERS
 # =========================
-def generate_abstract(synthesized):
-    prompt = f"""
+def abstract_prompt(synthesized):
+    return f"""
 Write an academic abstract based on the following research findings:
 
 {synthesized}
 """
-    return generator(prompt)[0]["generated_text"]
-
-def generate_methods(sections_dict):
-    methods_text = "\n".join(
-        sec["methodology"] for sec in sections_dict.values()
-        if sec.get("methodology")
-    )
 
-    prompt = f"""
+def methods_prompt(methods_text):
+    return f"""
 Write a unified Methods section using the following methodology descriptions:
 
 {methods_text}
 """
-    return generator(prompt)[0]["generated_text"]
 
-def generate_results(synthesized):
-    prompt = f"""
+def results_prompt(synthesized):
+    return f"""
 Write a structured Results section comparing findings across studies:
 
 {synthesized}
 """
-    return generator(prompt)[0]["generated_text"]
+
+def findings_summary_prompt(text):
+    return f"""
+Summarize the key research findings in the following text:
+
+{text}
+"""
+
+def methods_summary_prompt(text):
+    return f"""
+Summarize the methodology described in the following text:
+
+{text}
+"""
+
+# =========================
+# DRAFT GENERATORS
+# =========================
+def generate_abstract(synthesized):
+    synthesized = condense(synthesized, findings_summary_prompt, abstract_prompt)
+    return generate_texts([abstract_prompt(synthesized)])[0]
+
+def generate_methods(sections_dict):
+    methods_text = condense(collect_methods(sections_dict), methods_summary_prompt, methods_prompt)
+    return generate_texts([methods_prompt(methods_text)])[0]
+
+def generate_results(synthesized):
+    synthesized = condense(synthesized, findings_summary_prompt, results_prompt)
+    return generate_texts([results_prompt(synthesized)])[0]
 
 # =========================
 # APA REFERENCES (RULE-BASED)
@@ -90,17 +184,24 @@ def generate_apa_references(sections_dict):
 # PIPELINE
 # =========================
 def run_milestone_3():
+    sections, findings = load_inputs()
+
     print("[INFO] Synthesizing findings...")
     synthesized = synthesize_findings(findings)
 
-    print("[INFO] Generating Abstract...")
-    abstract = generate_abstract(synthesized)
-
-    print("[INFO] Generating Methods...")
-    methods = generate_methods(sections)
+    print("[INFO] Fitting inputs to the model's token budget...")
+    synthesized = condense(synthesized, findings_summary_prompt, abstract_prompt, results_prompt)
+    methods_text = retrieve_methods(sections) if RETRIEVAL_K else collect_methods(sections)
+    methods_text = condense(methods_text, methods_summary_prompt, methods_prompt)
 
-    print("[INFO] Generating Results...")
-    results = generate_results(synthesized)
+    # The three sections are independent, so they go to the model as one batch
+    print("[INFO] Generating Abstract, Methods and Results...")
+    abstract, methods, results = generate_texts([
+        abstract_prompt(synthesized),
+        methods_prompt(methods_text),
+        results_prompt(synthesized)
+    ])
+    print(f"[CACHE] {generation_cache.hits} generations reused from cache")
 
     print("[INFO] Generating APA References...")
     references = generate_apa_references(sections)
@@ -132,4 +233,6 @@ def run_milestone_3():
 # ENTRY POINT
 # =========================
 if __name__ == "__main__":
+    # --profile[=trace.json] reports tokenize / generate timings on exit
+    profiling.start_from_argv()
     run_milestone_3()
@@ -1,22 +1,37 @@
+import os
+import sys
 import json
+import threading
 import gradio as gr
-from transformers import pipeline
+
+# Shared helpers (model_registry, ...) live at the repository root
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from model_registry import get_generator as get_shared_generator
+from text_generation import generate_batch
+import profiling
 
 # =========================
 # CONFIG
 # =========================
 MODEL_NAME = "google/flan-t5-base"
+GENERATION_PARAMS = {"max_length": 512}
 DRAFT_FILE = "draft_output/final_draft.json"
 
+SECTIONS = [("abstract", "Abstract"), ("methods", "Methods"), ("results", "Results")]
+
 # =========================
 # LOAD MODEL
 # =========================
-print("[INFO] Loading Hugging Face model...")
-generator = pipeline(
-    "text2text-generation",
-    model=MODEL_NAME,
-    max_length=512
-)
+def get_generator():
+    # Shared process-wide, or served by model_server.py when MODEL_SERVER_URL is set
+    return get_shared_generator("text2text-generation", MODEL_NAME, **GENERATION_PARAMS)
+
+def warm_up_model():
+    # Load in the background so the UI starts without waiting for the model
+    threading.Thread(target=get_generator, daemon=True).start()
 
 # =========================
 # LOAD DRAFT
@@ -25,23 +40,20 @@ def load_draft():
     with open(DRAFT_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
-draft = load_draft()
-
 # =========================
 # REVIEW LOGIC
 # =========================
-def critique_section(text, section_name):
-    prompt = f"""
+def critique_prompt(text, section_name):
+    return f"""
 Critically review the following {section_name} section.
 Identify weaknesses, missing elements, and clarity issues.
 Provide concise improvement suggestions.
 
 {text}
 """
-    return generator(prompt)[0]["generated_text"]
 
-def revise_section(text, feedback, section_name):
-    prompt = f"""
+def revise_prompt(text, feedback, section_name):
+    return f"""
 Revise the following {section_name} section using the given feedback.
 
 SECTION:
@@ -50,77 +62,98 @@ SECTION:
 FEEDBACK:
 {feedback}
 """
-    return generator(prompt)[0]["generated_text"]
 
-# =========================
-# UI CALLBACK
-# =========================
-def run_review_cycle():
-    abstract = draft["abstract"]
-    methods = draft["methods"]
-    results = draft["results"]
+def generate_texts(prompts, stage="generate"):
+    # Independent prompts share one batched pipeline call
+    return generate_batch(get_generator, prompts, batch_size=len(prompts), stage=stage)
 
-    abstract_feedback = critique_section(abstract, "Abstract")
-    methods_feedback = critique_section(methods, "Methods")
-    results_feedback = critique_section(results, "Results")
+def critique_section(text, section_name):
+    return generate_texts([critique_prompt(text, section_name)], stage="critique")[0]
 
-    revised_abstract = revise_section(abstract, abstract_feedback, "Abstract")
-    revised_methods = revise_section(methods, methods_feedback, "Methods")
-    revised_results = revise_section(results, results_feedback, "Results")
+def revise_section(text, feedback, section_name):
+    return generate_texts([revise_prompt(text, feedback, section_name)], stage="revise")[0]
 
-    final_report = f"""
+def build_final_report(revised, references):
+    return f"""
 ABSTRACT
-{revised_abstract}
+{revised[0]}
 
 METHODS
-{revised_methods}
+{revised[1]}
 
 RESULTS
-{revised_results}
+{revised[2]}
 
 REFERENCES
-""" + "\n".join(draft["references"])
+""" + "\n".join(references)
 
-    return (
-        revised_abstract,
-        revised_methods,
-        revised_results,
-        final_report
-    )
+# =========================
+# UI CALLBACK
+# =========================
+def run_review_cycle():
+    """
+    Critiques all three sections in one batch, then revises all three in a
+    second batch, yielding to the textboxes after each stage instead of
+    waiting for six sequential inferences.
+    """
+    draft = load_draft()
+    originals = [draft[key] for key, _ in SECTIONS]
+
+    yield ("Reviewing...", "Reviewing...", "Reviewing...", "")
+
+    feedback = generate_texts([
+        critique_prompt(text, name) for text, (_, name) in zip(originals, SECTIONS)
+    ], stage="critique")
+    yield tuple(f"Revising using feedback:\n{fb}" for fb in feedback) + ("",)
+
+    revised = generate_texts([
+        revise_prompt(text, fb, name)
+        for text, fb, (_, name) in zip(originals, feedback, SECTIONS)
+    ], stage="revise")
+    yield (*revised, build_final_report(revised, draft["references"]))
 
 # =========================
 # GRADIO UI
 # =========================
-with gr.Blocks(title="AI Research Paper Reviewer & Refiner") as demo:
-    gr.Markdown("## 🧠 AI Research Paper Review & Refinement System")
-    gr.Markdown(
-        "This interface allows automated critique, revision, and final synthesis "
-        "of research paper sections generated in previous milestones."
-    )
-
-    with gr.Tab("Original Draft"):
-        gr.Textbox(draft["abstract"], label="Abstract", lines=10)
-        gr.Textbox(draft["methods"], label="Methods", lines=10)
-        gr.Textbox(draft["results"], label="Results", lines=10)
-
-    with gr.Tab("Refined Output"):
-        revised_abstract = gr.Textbox(label="Revised Abstract", lines=10)
-        revised_methods = gr.Textbox(label="Revised Methods", lines=10)
-        revised_results = gr.Textbox(label="Revised Results", lines=10)
-
-    with gr.Tab("Final Report"):
-        final_report_box = gr.Textbox(label="Complete Research Report", lines=25)
-
-    critique_btn = gr.Button("🔍 Critique & Revise")
-
-    critique_btn.click(
-        fn=run_review_cycle,
-        outputs=[
-            revised_abstract,
-            revised_methods,
-            revised_results,
-            final_report_box
-        ]
-    )
-
-demo.launch()
+def build_ui():
+    draft = load_draft()
+
+    with gr.Blocks(title="AI Research Paper Reviewer & Refiner") as demo:
+        gr.Markdown("## 🧠 AI Research Paper Review & Refinement System")
+        gr.Markdown(
+            "This interface allows automated critique, revision, and final synthesis "
+            "of research paper sections generated in previous milestones."
+        )
+
+        with gr.Tab("Original Draft"):
+            gr.Textbox(draft["abstract"], label="Abstract", lines=10)
+            gr.Textbox(draft["methods"], label="Methods", lines=10)
+            gr.Textbox(draft["results"], label="Results", lines=10)
+
+        with gr.Tab("Refined Output"):
+            revised_abstract = gr.Textbox(label="Revised Abstract", lines=10)
+            revised_methods = gr.Textbox(label="Revised Methods", lines=10)
+            revised_results = gr.Textbox(label="Revised Results", lines=10)
+
+        with gr.Tab("Final Report"):
+            final_report_box = gr.Textbox(label="Complete Research Report", lines=25)
+
+        critique_btn = gr.Button("🔍 Critique & Revise")
+
+        critique_btn.click(
+            fn=run_review_cycle,
+            outputs=[
+                revised_abstract,
+                revised_methods,
+                revised_results,
+                final_report_box
+            ]
+        )
+
+    return demo
+
+if __name__ == "__main__":
+    # --profile[=trace.json]: timings are reported when the server stops
+    profiling.start_from_argv()
+    warm_up_model()
+    build_ui().launch()
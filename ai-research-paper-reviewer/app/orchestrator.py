@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import importlib.util
+
+# Shared helpers (extraction_manifest, profiling, ...) live at the repository root
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from extraction_manifest import file_sha256
+import profiling
+
+# =========================
+# CONFIG
+# =========================
+MODULE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "module")
+STATE_FILE = ".pipeline_state.json"
+
+MILESTONES = {
+    "retrieval": ("milestone1_retrieval", "retrieval.py"),
+    "extraction": ("milestone2__extraction_analysis", "extraction_analysis.py"),
+    "drafting": ("milestone3_drafting", "drafting.py"),
+    "review": ("milestone4_review_ui", "review_ui.py"),
+}
+
+META_FILE = "papers_metadata.json"
+REVIEW_FILE = os.path.join("draft_output", "final_report.txt")
+
+def load_milestone(stage):
+    # Imported on demand: milestone modules create their folders (and
+    # check their API keys) at import time, relative to the working directory
+    folder, filename = MILESTONES[stage]
+    name = os.path.splitext(filename)[0]
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(MODULE_DIR, folder, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+def retrieved_pdfs():
+    # Only this run's retrieval: papers/ may still hold PDFs of earlier topics
+    try:
+        with open(META_FILE, "r", encoding="utf-8") as f:
+            return [paper["pdf_path"] for paper in json.load(f)]
+    except (OSError, ValueError):
+        return []
+
+# =========================
+# STAGE RUNNERS
+# =========================
+def run_retrieval(args):
+    load_milestone("retrieval").run_milestone_1(args.topic, limit=args.limit, workers=args.workers)
+
+def run_extraction(args):
+    load_milestone("extraction").run_milestone_2(workers=args.workers, top_k=args.top_k, paths=retrieved_pdfs())
+
+def run_drafting(args):
+    load_milestone("drafting").run_milestone_3()
+
+def run_review(args):
+    # Headless version of the UI's review cycle: keep its final state
+    review = load_milestone("review")
+    *_, final = review.run_review_cycle()
+    with open(REVIEW_FILE, "w", encoding="utf-8") as f:
+        f.write(final[-1])
+    print(f"[OUTPUT] Reviewed report saved to {REVIEW_FILE}")
+
+# =========================
+# STAGE GRAPH
+# =========================
+# Each stage declares what it depends on, which files and parameters make
+# up its inputs, and which files it produces. Downstream inputs are
+# upstream outputs, so a change anywhere re-runs exactly what follows it.
+STAGES = {
+    "retrieval": {
+        "deps": [],
+        "inputs": lambda args: [],
+        "params": lambda args: {"topic": args.topic, "limit": args.limit},
+        "outputs": lambda args: [META_FILE],
+        "run": run_retrieval,
+    },
+    "extraction": {
+        "deps": ["retrieval"],
+        # The PDFs listed by retrieval (names and contents both fingerprinted)
+        "inputs": lambda args: retrieved_pdfs(),
+        "params": lambda args: {
+            "extractor": load_milestone("extraction").EXTRACTOR_VERSION, "top_k": args.top_k
+        },
+        "outputs": lambda args: [
+            os.path.join("extracted_data", "section_wise_text.json"),
+            os.path.join("extracted_data", "key_findings.json"),
+        ],
+        "run": run_extraction,
+    },
+    "drafting": {
+        "deps": ["extraction"],
+        "inputs": lambda args: STAGES["extraction"]["outputs"](args),
+        "params": lambda args: {
+            "model": load_milestone("drafting").MODEL_NAME,
+            "generation": load_milestone("drafting").GENERATION_PARAMS,
+            "retrieval_k": load_milestone("drafting").RETRIEVAL_K,
+        },
+        "outputs": lambda args: [
+            os.path.join("draft_output", "final_draft.json"),
+            os.path.join("draft_output", "final_draft.txt"),
+        ],
+        "run": run_drafting,
+    },
+    "review": {
+        "deps": ["drafting"],
+        "inputs": lambda args: [os.path.join("draft_output", "final_draft.json")],
+        "params": lambda args: {"model": load_milestone("review").MODEL_NAME},
+        "outputs": lambda args: [REVIEW_FILE],
+        "run": run_review,
+    },
+}
+
+def plan(target):
+    """Stages needed for target, dependencies first (depth-first topological order)."""
+    order = []
+
+    def visit(name):
+        for dep in STAGES[name]["deps"]:
+            visit(dep)
+        if name not in order:
+            order.append(name)
+
+    visit(target)
+    return order
+
+def fingerprint(stage, args):
+    # Content hashes, so a touched but unchanged file does not trigger a re-run
+    digest = hashlib.sha256()
+    digest.update(json.dumps(stage["params"](args), sort_keys=True).encode("utf-8"))
+    for path in stage["inputs"](args):
+        digest.update(path.encode("utf-8"))
+        digest.update(file_sha256(path).encode("utf-8"))
+    return digest.hexdigest()
+
+# =========================
+# PIPELINE
+# =========================
+def run(args):
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    for name in plan(args.target):
+        stage = STAGES[name]
+        key = fingerprint(stage, args)
+        outputs_present = all(os.path.exists(p) for p in stage["outputs"](args))
+
+        if not args.force and state.get(name) == key and outputs_present:
+            print(f"[SKIP] {name}: inputs unchanged")
+            continue
+
+        print(f"\n[STAGE] {name}")
+        with profiling.span(name):
+            stage["run"](args)
+
+        state[name] = key
+        with open(STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+
+    print(f"\n[SUCCESS] Pipeline up to '{args.target}' is up to date")
+
+# =========================
+# ENTRY POINT
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run retrieval -> extraction -> drafting -> review, skipping up-to-date stages"
+    )
+    parser.add_argument("topic", help="research topic to retrieve papers for")
+    parser.add_argument("--limit", type=int, default=5, help="papers to retrieve")
+    parser.add_argument("--target", choices=list(STAGES), default="review",
+                        help="last stage to run (its dependencies run first)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="parallel downloads / extraction processes")
+    parser.add_argument("--top-k", type=int, default=5, help="key findings kept per paper")
+    parser.add_argument("--force", action="store_true", help="re-run every stage")
+    parser.add_argument("--workdir", default=".", help="folder holding papers/, extracted_data/, ...")
+    parser.add_argument("--profile", nargs="?", const=profiling.DEFAULT_TRACE_FILE, metavar="TRACE",
+                        help="record stage timings and write a Chrome trace (default: %(const)s)")
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+    args.top_k = max(1, args.top_k)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    os.chdir(args.workdir)
+    if args.profile:
+        profiling.start(args.profile)
+    run(args)
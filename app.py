@@ -1,14 +1,23 @@
 
 
 import streamlit as st
-import requests
 import json
 import time
 import os
+import queue
 from dotenv import load_dotenv
 from google import genai
 from google.genai.types import HttpOptions
 
+from s2_client import get_client
+from search_cache import SearchCache, DEFAULT_TTL, normalize_topic
+from section_stream import IncrementalSectionParser
+from vector_index import DEFAULT_PERSIST_DIR
+from topic_batch import DEFAULT_TOPIC_MAP_FILE
+from prompt_budget import pack, estimate_tokens
+import profiling
+from job_queue import JobQueue, FAILED
+
 # =========================
 # ENV & GEMINI CONFIG
 # =========================
@@ -27,51 +36,104 @@ client = genai.Client(
 # =========================
 # SEMANTIC SCHOLAR SEARCH
 # =========================
+PAPER_COUNTS = [3, 5, 10, 15]
+SEARCH_FIELDS = "title,abstract,tldr"
+
+# Repeated topics are answered from a local sqlite cache; every search asks
+# for the largest paper count so any later count for the topic is a hit
+search_cache = SearchCache(ttl=int(os.getenv("SEARCH_CACHE_TTL", DEFAULT_TTL)))
+
 def search_papers(topic, limit):
-    url = (
-        "https://api.semanticscholar.org/graph/v1/paper/search"
-        f"?query={topic}&limit={limit}&fields=title,abstract,tldr"
-    )
+    cached = search_cache.get(topic, SEARCH_FIELDS, limit)
+    if cached is not None:
+        return cached
 
+    fetch_limit = max(limit, max(PAPER_COUNTS))
+
+    # Shared client: pooled session and rate limiting; short 429 backoff while the user waits
     try:
-        res = requests.get(url, timeout=15)
-        if res.status_code == 200:
-            return res.json().get("data", [])
+        papers = get_client(interactive=True).search(topic, limit=fetch_limit, fields=SEARCH_FIELDS)
     except:
-        pass
-    return []
+        return []
+
+    search_cache.put(topic, SEARCH_FIELDS, fetch_limit, papers)
+    return papers[:limit]
 
 # =========================
-# STREAMLIT UI
+# LOCAL CORPUS RETRIEVAL
 # =========================
-st.set_page_config(page_title="Research paper summarizer", layout="wide")
-st.title("Research paper summarizer")
+# When the collectors have built a vector index, only the top-k most
+# relevant section chunks are added to the prompt
+INDEX_TOP_K = 5
+# Chunks further than this cosine distance from the topic are left out
+EXCERPT_MAX_DISTANCE = float(os.getenv("EXCERPT_MAX_DISTANCE", 0.6))
 
-col1, col2 = st.columns([3, 1])
-with col1:
-    topic = st.text_input("Research Topic", "Artificial Intelligence")
-with col2:
-    paper_count = st.selectbox("Paper Count", [3, 5, 10, 15], index=1)
+@st.cache_resource
+def get_section_index():
+    from vector_index import SectionIndex
+    return SectionIndex()
+
+def topic_paper_ids(topic):
+    # Batch collections (search.py --topics) record which papers belong to each topic
+    try:
+        with open(DEFAULT_TOPIC_MAP_FILE, "r", encoding="utf-8") as f:
+            topic_map = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for name, ids in topic_map.items():
+        if normalize_topic(name) == normalize_topic(topic):
+            return ids
+    return None
+
+def local_excerpts(topic, k=INDEX_TOP_K):
+    if not os.path.isdir(DEFAULT_PERSIST_DIR):
+        return []
+
+    # Restrict to the topic's own papers when known; the distance cutoff
+    # keeps chunks of unrelated topics out either way
+    ids = topic_paper_ids(topic)
+    where = {"paper": {"$in": ids}} if ids else None
+    try:
+        hits = get_section_index().query(topic, k=k, where=where)
+    except Exception:
+        return []
+    return [
+        {"title": h["title"], "section": h["section"], "text": h["text"]}
+        for h in hits if h["distance"] <= EXCERPT_MAX_DISTANCE
+    ]
 
 # =========================
-# MAIN ACTION
+# PROMPT BUDGET
 # =========================
-if st.button("🚀 Execute Search", type="primary"):
-    with st.spinner("Searching papers and generating research sections..."):
-        papers = search_papers(topic, paper_count)
+# Literature and excerpts are packed into fixed token budgets (ranked by
+# relevance, abstracts truncated) so prompt size does not grow with paper count
+LITERATURE_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 3000))
+EXCERPT_TOKEN_BUDGET = int(os.getenv("EXCERPT_TOKEN_BUDGET", 1000))
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
 
-        if not papers:
-            st.error("No papers found.")
-            st.stop()
+def build_prompt(topic, paper_count):
+    papers = search_papers(topic, paper_count)
+    if not papers:
+        raise LookupError("No papers found.")
 
-        dataset = []
-        for p in papers:
-            dataset.append({
-                "title": p.get("title"),
-                "summary": p.get("tldr", {}).get("text") or p.get("abstract") or ""
-            })
+    dataset = []
+    for p in papers:
+        dataset.append({
+            "title": p.get("title"),
+            "summary": (p.get("tldr") or {}).get("text") or p.get("abstract") or ""
+        })
+    dataset, _, dropped = pack(topic, dataset, LITERATURE_TOKEN_BUDGET)
 
-        prompt = f"""
+    excerpts, _, _ = pack(
+        topic, local_excerpts(topic), EXCERPT_TOKEN_BUDGET, text_key="text", dedupe_key="text"
+    )
+    excerpt_block = ""
+    if excerpts:
+        excerpt_block = "\nRelevant excerpts from collected papers:\n" + compact_json(excerpts)
+
+    prompt = f"""
 You are an academic research writer.
 
 Using the following literature on "{topic}", generate:
@@ -90,53 +152,147 @@ Rules:
 - No mention of AI tools
 
 Literature:
-{json.dumps(dataset, ensure_ascii=False)}
+{compact_json(dataset)}
+{excerpt_block}
 """
+    return prompt, len(dataset), dropped
+
+# =========================
+# SHARED GENERATION JOBS
+# =========================
+# Search + Gemini run on one worker pool shared by all sessions. Sessions
+# asking for the same topic and count share a single in-flight job, and
+# GEMINI_RATE_PER_MINUTE (when set) caps how fast jobs start.
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", 4))
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", 32))
+GEMINI_RATE_PER_MINUTE = float(os.getenv("GEMINI_RATE_PER_MINUTE", 0))
+POLL_INTERVAL = 0.2  # seconds
+
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(
+        workers=GENERATION_WORKERS,
+        max_pending=MAX_PENDING_JOBS,
+        rate=GEMINI_RATE_PER_MINUTE / 60 or None
+    )
 
-        try:
-            response = client.models.generate_content(
+def generation_job(job, topic, paper_count):
+    # Runs on a worker thread: streamed text goes to job.emit() for pollers
+    with profiling.profile() as profiler:
+        prompt, n_papers, dropped = build_prompt(topic, paper_count)
+        job.info.update(papers=n_papers, dropped=dropped, prompt_estimate=estimate_tokens(prompt))
+
+        usage = None
+        with profiling.span("generate", bytes=len(prompt)) as timing:
+            stream = client.models.generate_content_stream(
                 model="gemini-3-flash-preview",
                 contents=prompt
             )
-            output = response.text
-        except Exception as e:
-            st.error(e)
-            st.stop()
+            for chunk in stream:
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    job.emit(chunk.text)
+            if usage and usage.total_token_count:
+                timing.add(tokens=usage.total_token_count)
+
+    job.info["usage"] = usage
+    return profiler.summary()
+
+# =========================
+# STREAMLIT UI
+# =========================
+SECTION_LAYOUT = [
+    ("Abstract", "🧠"),
+    ("Introduction", "📘"),
+    ("Methods", "🧪"),
+    ("Conclusion", "🧾"),
+    ("References", "📚")
+]
+
+st.set_page_config(page_title="Research paper summarizer", layout="wide")
+st.title("Research paper summarizer")
+
+col1, col2 = st.columns([3, 1])
+with col1:
+    topic = st.text_input("Research Topic", "Artificial Intelligence")
+with col2:
+    paper_count = st.selectbox("Paper Count", PAPER_COUNTS, index=1)
+
+# =========================
+# MAIN ACTION
+# =========================
+if st.button("🚀 Execute Search", type="primary"):
+    try:
+        job = get_job_queue().submit(
+            (normalize_topic(topic), paper_count), generation_job, topic, paper_count
+        )
+    except queue.Full:
+        st.warning("Too many requests are waiting right now. Please try again in a moment.")
+        st.stop()
+
+    with st.spinner("Searching papers..."):
+        while "papers" not in job.info and not job.done:
+            time.sleep(POLL_INTERVAL)
+
+    if job.state == FAILED and "papers" not in job.info:
+        st.error(job.error)
+        st.stop()
 
     # =========================
-    # DISPLAY IN COLUMNS
+    # DISPLAY (STREAMED)
     # =========================
     st.markdown("---")
     st.subheader("📄 Generated Research Paper")
 
-    # left, right = st.columns(2)
+    # One placeholder per section, filled in as the job's text arrives
+    placeholders = {}
+    for i, (title, icon) in enumerate(SECTION_LAYOUT):
+        st.markdown(f"### {icon} {title}")
+        placeholders[title] = st.empty()
+        if i < len(SECTION_LAYOUT) - 1:
+            st.divider()
 
-    # with left:
-    st.markdown("### 🧠 Abstract")
-    st.markdown(output.split("Introduction")[0])
-    st.divider()
+    parser = IncrementalSectionParser(title for title, _ in SECTION_LAYOUT)
 
-    st.markdown("### 📘 Introduction")
-    st.markdown(
-        "Introduction" + output.split("Introduction")[1].split("Methods")[0]
+    dropped = job.info["dropped"]
+    budget_note = st.empty()
+    budget_note.caption(
+        f"Prompt ≈ {job.info['prompt_estimate']} tokens · {job.info['papers']} papers"
+        + (f" ({dropped} duplicate or over-budget papers left out)" if dropped else "")
     )
-    st.divider()
 
-    st.markdown("### 🧪 Methods")
-    st.markdown(
-        "Methods" + output.split("Methods")[1].split("Conclusion")[0]
-    )
-    st.divider()
+    seen = 0
+    while True:
+        # Read done before draining, so text emitted just before finishing is not missed
+        finished = job.done
+        for text in job.updates_since(seen):
+            seen += 1
+            for title in parser.feed(text):
+                placeholders[title].markdown(parser.text(title))
+        if finished:
+            break
+        time.sleep(POLL_INTERVAL)
 
-    # with right:
-    st.markdown("### 🧾 Conclusion")
-    st.markdown(
-        "Conclusion" + output.split("Conclusion")[1].split("References")[0]
-    )
-    st.divider()
+    if job.state == FAILED:
+        st.error(job.error)
+        st.stop()
 
-    st.markdown("### 📚 References")
-    st.markdown(
-        "References" + output.split("References")[1]
-    )
+    for title in parser.finish():
+        placeholders[title].markdown(parser.text(title))
+
+    usage = job.info.get("usage")
+    if usage and usage.prompt_token_count:
+        budget_note.caption(
+            f"Prompt: {usage.prompt_token_count} tokens · {job.info['papers']} papers · "
+            f"{usage.candidates_token_count or 0} tokens generated"
+        )
+
+    for title in parser.missing():
+        placeholders[title].caption("This section was not present in the generated output.")
 
+    with st.expander("⏱ Stage timings"):
+        st.table([
+            {"stage": row["name"], "calls": row["count"], "seconds": round(row["seconds"], 3),
+             "bytes": row.get("bytes", 0), "tokens": row.get("tokens", 0)}
+            for row in job.result
+        ])
@@ -0,0 +1,120 @@
+"""
+Offline benchmarks for the pipeline stages (pytest-benchmark).
+
+    pip install -r benchmarks/requirements.txt
+    python -m pytest benchmarks                         # run and save to .benchmarks/
+    python -m pytest benchmarks --benchmark-compare     # compare with the last saved run
+
+Fixtures are the bundled papers/*.pdf, dataset.json and a recorded Semantic
+Scholar search (fixtures/s2_search.json, re-record with record_s2.py) that
+is replayed through the real client, so nothing touches the network or
+loads a model.
+"""
+import os
+import sys
+import json
+import glob
+import importlib.util
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODULE_DIR = os.path.join(ROOT_DIR, "ai-research-paper-reviewer", "app", "module")
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# =========================
+# HELPERS
+# =========================
+def load_module(name, path):
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+class ReplayAdapter(BaseAdapter):
+    """Serves recorded Semantic Scholar search pages, keyed by offset."""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = {page["params"]["offset"]: page["response"] for page in pages}
+
+    def send(self, request, **kwargs):
+        offset = int(parse_qs(urlparse(request.url).query).get("offset", ["0"])[0])
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = 200 if offset in self.pages else 404
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(self.pages.get(offset, {"error": "not recorded"})).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+# =========================
+# FIXTURES
+# =========================
+@pytest.fixture(scope="session")
+def workdir(tmp_path_factory):
+    # Modules create their output / cache folders in the working directory on import
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("bench"))
+    yield os.getcwd()
+    os.chdir(previous)
+
+@pytest.fixture(scope="session")
+def pdf_paths():
+    paths = sorted(glob.glob(os.path.join(ROOT_DIR, "papers", "*.pdf")))
+    if not paths:
+        pytest.skip("no bundled PDFs in papers/")
+    return paths
+
+@pytest.fixture(scope="session")
+def dataset():
+    with open(os.path.join(ROOT_DIR, "dataset.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(scope="session")
+def s2_recording():
+    with open(os.path.join(FIXTURE_DIR, "s2_search.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(scope="session")
+def s2_client(s2_recording):
+    from s2_client import SemanticScholarClient
+
+    # No rate limiting: only the client's own overhead is measured
+    client = SemanticScholarClient(rate=1e9)
+    client.session.mount("https://", ReplayAdapter(s2_recording["pages"]))
+    return client
+
+@pytest.fixture(scope="session")
+def collector(workdir):
+    return load_module("search", os.path.join(ROOT_DIR, "search.py"))
+
+@pytest.fixture(scope="session")
+def extraction(workdir):
+    return load_module(
+        "extraction_analysis",
+        os.path.join(MODULE_DIR, "milestone2__extraction_analysis", "extraction_analysis.py")
+    )
+
+@pytest.fixture(scope="session")
+def drafting(workdir):
+    return load_module("drafting", os.path.join(MODULE_DIR, "milestone3_drafting", "drafting.py"))
+
+@pytest.fixture(scope="session")
+def pdf_texts(extraction, pdf_paths):
+    return [extraction.extract_text_from_pdf(path) for path in pdf_paths]
+
+@pytest.fixture(scope="session")
+def pdf_sections(extraction, pdf_texts):
+    return [extraction.split_into_sections(text) for text in pdf_texts]
@@ -0,0 +1,41 @@
+import os
+import sys
+import json
+
+# Repository root modules (s2_client, ...)
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from dotenv import load_dotenv
+from s2_client import get_client
+
+# =========================
+# CONFIG
+# =========================
+FIXTURE_FILE = os.path.join(os.path.dirname(__file__), "fixtures", "s2_search.json")
+SEARCH_FIELDS = "title,authors,year,abstract,openAccessPdf,citationCount"
+PAGE_SIZE = 50
+MAX_PAGES = 3
+
+# =========================
+# ENTRY POINT
+# =========================
+if __name__ == "__main__":
+    # Re-record the replayed search: python benchmarks/record_s2.py "topic"
+    load_dotenv()
+    topic = sys.argv[1] if len(sys.argv) > 1 else "data security"
+
+    pages = []
+    offset = 0
+    for _ in range(MAX_PAGES):
+        page = get_client().search_page(topic, PAGE_SIZE, offset, SEARCH_FIELDS)
+        pages.append({"params": {"query": topic, "limit": PAGE_SIZE, "offset": offset}, "response": page})
+        if page.get("next") is None or not page.get("data"):
+            break
+        offset = page["next"]
+
+    with open(FIXTURE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"query": topic, "fields": SEARCH_FIELDS, "pages": pages}, f, indent=2, ensure_ascii=False)
+
+    print(f"[RECORDED] {len(pages)} pages for '{topic}' -> {FIXTURE_FILE}")
@@ -0,0 +1,29 @@
+import pytest
+
+# =========================
+# MILESTONE 3: synthesis and prompt builders
+# =========================
+@pytest.fixture(scope="module")
+def draft_inputs(extraction, pdf_paths, pdf_sections):
+    sections = {path: secs for path, secs in zip(pdf_paths, pdf_sections)}
+    findings = dict(zip(pdf_paths, extraction.extract_key_findings_batch(
+        [secs["introduction"] + secs["conclusion"] for secs in pdf_sections]
+    )))
+    return sections, findings
+
+def test_synthesize_findings(benchmark, drafting, draft_inputs):
+    _, findings = draft_inputs
+    benchmark(drafting.synthesize_findings, findings)
+
+def test_collect_methods(benchmark, drafting, dataset):
+    sections = {p["pdf_file"]: {"methodology": "\n".join(p["sections"].values())} for p in dataset}
+    assert benchmark(drafting.collect_methods, sections)
+
+@pytest.mark.parametrize("builder", [
+    "abstract_prompt", "methods_prompt", "results_prompt",
+    "findings_summary_prompt", "methods_summary_prompt"
+])
+def test_prompt_builder(benchmark, drafting, dataset, builder):
+    text = "\n".join(p["abstract"] for p in dataset)
+    prompt = benchmark(getattr(drafting, builder), text)
+    assert text in prompt
@@ -0,0 +1,28 @@
+# =========================
+# MILESTONE 1 / COLLECTOR: pymupdf4llm sections
+# =========================
+def test_extract_sections(benchmark, collector, pdf_paths):
+    # Seconds per PDF, so a few fixed rounds instead of calibrated ones
+    results = benchmark.pedantic(
+        lambda: [collector.extract_sections(path) for path in pdf_paths], rounds=3, iterations=1
+    )
+    assert all("error" not in sections for sections in results)
+
+# =========================
+# MILESTONE 2: text, sections, key findings
+# =========================
+def test_extract_text_from_pdf(benchmark, extraction, pdf_paths):
+    texts = benchmark.pedantic(
+        lambda: [extraction.extract_text_from_pdf(path) for path in pdf_paths], rounds=5, iterations=1
+    )
+    assert all(texts)
+
+def test_split_into_sections(benchmark, extraction, pdf_texts):
+    sections = benchmark(lambda: [extraction.split_into_sections(text) for text in pdf_texts])
+    assert all(set(s) == set(extraction.SECTION_NAMES) for s in sections)
+
+def test_extract_key_findings(benchmark, extraction, pdf_texts):
+    # Bundled PDFs have little text under a "Results" heading, so the whole
+    # text is used as input to keep the workload meaningful
+    findings = benchmark(extraction.extract_key_findings_batch, pdf_texts)
+    assert len(findings) == len(pdf_texts)
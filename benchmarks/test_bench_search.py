@@ -0,0 +1,34 @@
+# =========================
+# SEMANTIC SCHOLAR (recorded responses)
+# =========================
+def test_search_page(benchmark, s2_client, s2_recording):
+    papers = benchmark(s2_client.search, s2_recording["query"], 5, 0, s2_recording["fields"])
+    assert papers
+
+def test_iter_search_pages(benchmark, s2_client, s2_recording):
+    def all_pages():
+        return [papers for _, papers in s2_client.iter_search_pages(
+            s2_recording["query"], 5, 0, s2_recording["fields"]
+        )]
+
+    pages = benchmark(all_pages)
+    assert len(pages) == len(s2_recording["pages"])
+
+# =========================
+# APP: search cache and prompt packing
+# =========================
+def test_search_cache_hit(benchmark, workdir, s2_recording):
+    from search_cache import SearchCache
+
+    cache = SearchCache("bench_search_cache.sqlite")
+    papers = s2_recording["pages"][0]["response"]["data"]
+    cache.put(s2_recording["query"], s2_recording["fields"], len(papers), papers)
+
+    assert benchmark(cache.get, s2_recording["query"], s2_recording["fields"], len(papers)) == papers
+
+def test_pack_prompt(benchmark, dataset):
+    from prompt_budget import pack
+
+    items = [{"title": p["title"], "summary": p["abstract"]} for p in dataset]
+    packed, used, _ = benchmark(pack, "data security", items, 1000)
+    assert packed and used <= 1000
@@ -0,0 +1,113 @@
+import math
+import heapq
+import datetime
+
+from prompt_budget import terms, relevance
+
+# =========================
+# CONFIG
+# =========================
+# Score = weighted citations + recency + relevance, each scaled to 0..1
+CITATION_WEIGHT = 1.0
+RECENCY_WEIGHT = 0.5
+RELEVANCE_WEIGHT = 1.5
+
+CITATION_SCALE = 1000  # citation count that scores 1.0 (log scale)
+RECENCY_HORIZON = 10   # years until recency reaches 0
+SEARCH_RANK_SCALE = 50  # S2's own ordering: rank 50 counts half as relevant as rank 0
+
+# Wait for this many candidates per paper still needed before downloading,
+# so the best of several pages is tried first
+POOL_FACTOR = 2
+
+# =========================
+# HELPERS
+# =========================
+def paper_keys(paper):
+    """Identifiers that mark two search results as the same paper."""
+    keys = []
+    if paper.get("paperId"):
+        keys.append("s2:" + paper["paperId"])
+    doi = (paper.get("externalIds") or {}).get("DOI")
+    if doi:
+        keys.append("doi:" + doi.lower())
+    return keys
+
+def has_open_pdf(paper):
+    return bool((paper.get("openAccessPdf") or {}).get("url"))
+
+# =========================
+# CANDIDATE PLANNER
+# =========================
+class CandidatePlanner:
+    """
+    Pool of download candidates fed page by page from a paginated search.
+
+    Results without an open-access PDF, or already seen under the same
+    paperId / DOI on an earlier page, are dropped on arrival. take() hands
+    out the best remaining candidates by score. `to_dict` maps library
+    objects (e.g. semanticscholar.Paper) to the raw API dict used for
+    scoring; the original objects are what take() returns.
+    """
+
+    def __init__(self, topic, to_dict=None, pool_factor=POOL_FACTOR):
+        self.topic_terms = terms(topic)
+        self.to_dict = to_dict or (lambda item: item)
+        self.pool_factor = pool_factor
+        self.this_year = datetime.date.today().year
+
+        self.seen = set()
+        self.excluded = set()
+        self.pool = []  # heap of (-score, arrival, item)
+        self.arrivals = 0
+        self.duplicates = 0
+        self.closed_access = 0
+
+    def __len__(self):
+        return len(self.pool)
+
+    def score(self, paper, rank):
+        citations = min(1.0, math.log1p(paper.get("citationCount") or 0) / math.log1p(CITATION_SCALE))
+
+        year = paper.get("year")
+        recency = 0.5 if not year else max(0.0, 1 - (self.this_year - year) / RECENCY_HORIZON)
+
+        text = f"{paper.get('title') or ''} {paper.get('abstract') or ''}"
+        search_rank = 1 / (1 + rank / SEARCH_RANK_SCALE)
+        topical = (relevance(self.topic_terms, text) + search_rank) / 2
+
+        return CITATION_WEIGHT * citations + RECENCY_WEIGHT * recency + RELEVANCE_WEIGHT * topical
+
+    def exclude(self, keys):
+        """Silently drop papers with these keys (e.g. tried in an earlier run)."""
+        self.excluded.update(keys)
+
+    def add(self, items, offset=0):
+        """Add one page of results (starting at `offset` in the search); returns how many were new."""
+        added = 0
+        for rank, item in enumerate(items, start=offset):
+            paper = self.to_dict(item)
+            keys = paper_keys(paper)
+            if any(k in self.excluded for k in keys):
+                self.seen.update(keys)
+                continue
+            if any(k in self.seen for k in keys):
+                self.duplicates += 1
+                continue
+            self.seen.update(keys)
+
+            if not has_open_pdf(paper):
+                self.closed_access += 1
+                continue
+
+            heapq.heappush(self.pool, (-self.score(paper, rank), self.arrivals, item))
+            self.arrivals += 1
+            added += 1
+        return added
+
+    def ready(self, needed):
+        return len(self.pool) >= needed * self.pool_factor
+
+    def take(self, n):
+        """Best n candidates, highest score first; they leave the pool."""
+        return [heapq.heappop(self.pool)[2] for _ in range(min(n, len(self.pool)))]
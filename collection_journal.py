@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+
+from candidate_planner import paper_keys
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_JOURNAL_DIR = ".journal"
+
+# =========================
+# COLLECTION JOURNAL
+# =========================
+class CollectionJournal:
+    """
+    Append-only JSONL checkpoint of one collection run (one topic).
+
+    Every line is one event, fsynced as it is written:
+      page   - a search page as returned by the API, and the offset after it
+      tried  - keys of candidates sent to the download pipeline
+      paper  - corpus id and keys of an accepted paper (already in the corpus)
+      done   - the run finished; later runs reuse its papers
+    Opening an existing journal replays it, so an interrupted run resumes
+    with the same candidate pool, skips what was tried and continues the
+    search where it stopped. A torn last line (crash mid-write) is dropped.
+    fresh=True discards the existing journal, e.g. to re-collect a topic
+    whose run is done.
+    """
+
+    def __init__(self, topic, journal_dir=DEFAULT_JOURNAL_DIR, fresh=False):
+        self.topic = topic
+        name = hashlib.sha1(topic.strip().lower().encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(journal_dir, f"{name}.jsonl")
+
+        self.pages = []      # (offset, raw results) in search order
+        self.next_offset = 0
+        self.tried = set()
+        self.paper_ids = []  # accepted papers, in acceptance order
+        self.done = False
+
+        os.makedirs(journal_dir, exist_ok=True)
+        if fresh and os.path.exists(self.path):
+            os.remove(self.path)
+        self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+        if not os.path.getsize(self.path):
+            self._append({"event": "start", "topic": topic})
+
+    @property
+    def resumed(self):
+        return bool(self.pages or self.paper_ids)
+
+    # ---------- replay ----------
+    def _replay(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+
+        good = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            self._apply(event)
+            good += len(line)
+
+        if good < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def _apply(self, event):
+        kind = event["event"]
+        if kind == "page":
+            self.pages.append((event["offset"], event["results"]))
+            self.next_offset = max(self.next_offset, event["next_offset"])
+        elif kind == "tried":
+            self.tried.update(event["keys"])
+        elif kind == "paper":
+            self.tried.update(event["keys"])
+            if event["id"] not in self.paper_ids:
+                self.paper_ids.append(event["id"])
+        elif kind == "done":
+            self.done = True
+
+    def restore(self, planner, wrap=None):
+        """Refill a fresh CandidatePlanner with the journaled pages, minus tried candidates."""
+        planner.exclude(self.tried)
+        for offset, results in self.pages:
+            planner.add([wrap(r) for r in results] if wrap else results, offset)
+
+    # ---------- checkpoints ----------
+    def _append(self, event):
+        self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(event)
+
+    def record_page(self, offset, results, next_offset):
+        self._append({"event": "page", "offset": offset, "next_offset": next_offset, "results": results})
+
+    def record_tried(self, papers):
+        keys = [k for paper in papers for k in paper_keys(paper)]
+        if keys:
+            self._append({"event": "tried", "keys": keys})
+
+    def record_paper(self, pid, paper):
+        self._append({"event": "paper", "id": pid, "keys": paper_keys(paper)})
+
+    def record_done(self):
+        if not self.done:
+            self._append({"event": "done"})
+
+    def close(self):
+        self._file.close()
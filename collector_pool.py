@@ -0,0 +1,174 @@
+import os
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import profiling
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_EXTRACT_WORKERS = 2
+
+
+def worker_count(env_name, default):
+    try:
+        return max(1, int(os.getenv(env_name, default)))
+    except ValueError:
+        return default
+
+class WorkerPools:
+    """Download thread pool and extraction process pool, reusable across run_pipeline calls."""
+
+    def __init__(self, download_workers=DEFAULT_DOWNLOAD_WORKERS, extract_workers=DEFAULT_EXTRACT_WORKERS):
+        self.extract_workers = max(1, extract_workers)
+        self.download = ThreadPoolExecutor(max_workers=max(1, download_workers))
+        self.extract = ProcessPoolExecutor(max_workers=self.extract_workers)
+
+    def restart_extract(self, broken):
+        """Replace the extraction pool if it is still `broken` (a worker process died)."""
+        if self.extract is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.extract = ProcessPoolExecutor(max_workers=self.extract_workers)
+
+    def shutdown(self):
+        self.download.shutdown()
+        self.extract.shutdown()
+
+@contextmanager
+def worker_pools(download_workers=DEFAULT_DOWNLOAD_WORKERS, extract_workers=DEFAULT_EXTRACT_WORKERS):
+    pools = WorkerPools(download_workers, extract_workers)
+    try:
+        yield pools
+    finally:
+        pools.shutdown()
+
+# =========================
+# DOWNLOAD -> EXTRACT PIPELINE
+# =========================
+def run_pipeline(candidates, download, place, extract, needed,
+                 download_workers=DEFAULT_DOWNLOAD_WORKERS,
+                 extract_workers=DEFAULT_EXTRACT_WORKERS,
+                 manifest=None, on_accept=None, pools=None):
+    """
+    Download candidates on a thread pool and extract accepted PDFs on a
+    process pool.
+
+    download(item, idx) -> temporary path or None
+    place(item, tmp_path, n) -> final path for the n-th accepted paper
+    extract(path) -> sections dict (must be picklable)
+
+    Candidates are accepted strictly in input order, so the selected papers,
+    their numbering and their file names match a one-at-a-time run. At most
+    2 * download_workers downloads are in flight, and nothing new is fetched
+    once `needed` papers have been accepted.
+
+    With an ExtractionManifest, PDFs whose content was already extracted by
+    the same extractor version reuse the stored sections instead of being
+    sent to the extraction pool.
+
+    on_accept(item, path, sections), if given, is called for each accepted
+    paper as soon as its sections are ready, so callers can checkpoint
+    papers one at a time.
+
+    `pools` from worker_pools() are used instead of fresh ones, so a batch
+    of runs starts its worker processes only once.
+
+    An extraction worker that dies (e.g. a crash inside the PDF library)
+    breaks the whole process pool. The pool is then rebuilt and each
+    affected PDF is extracted once more; a PDF that breaks the new pool as
+    well gets {"error": ...} sections like any failed extraction.
+    """
+    if needed <= 0 or not candidates:
+        return []
+
+    accepted = []
+    window = max(1, download_workers) * 2
+    profiler = profiling.active()
+    queue = iter(enumerate(candidates))
+    pending = deque()
+
+    pool_context = nullcontext(pools) if pools else worker_pools(download_workers, extract_workers)
+    with pool_context as pools:
+        submitted_to = {}
+
+        def submit_extract(path):
+            pool = pools.extract
+            try:
+                if profiler:
+                    # Spans recorded in the worker come back with the result
+                    future = pool.submit(profiling.run_traced, "extract", extract, path)
+                else:
+                    future = pool.submit(extract, path)
+            except BrokenProcessPool:
+                pools.restart_extract(pool)
+                return submit_extract(path)
+            submitted_to[future] = pool
+            return future
+
+        def extraction_result(path, future):
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                pools.restart_extract(submitted_to[future])
+            # Retried by itself, so a second crash is most likely caused by this PDF
+            retry = submit_extract(path)
+            try:
+                return retry.result()
+            except BrokenProcessPool:
+                pools.restart_extract(submitted_to[retry])
+                failed = {"error": "Extraction worker crashed"}
+                return (failed, []) if profiler else failed
+
+        def refill():
+            while len(pending) < window:
+                nxt = next(queue, None)
+                if nxt is None:
+                    return
+                idx, item = nxt
+                pending.append((item, pools.download.submit(download, item, idx)))
+
+        refill()
+        while pending and len(accepted) < needed:
+            item, future = pending.popleft()
+            tmp_path = future.result()
+            if tmp_path:
+                path = place(item, tmp_path, len(accepted) + 1)
+                stored = manifest.lookup(path) if manifest else None
+                if stored is not None:
+                    future = Future()
+                    future.set_result(stored)
+                    accepted.append((item, path, future, True))
+                else:
+                    accepted.append((item, path, submit_extract(path), False))
+            if len(accepted) < needed:
+                refill()
+
+        # Goal reached: drop queued downloads and discard finished extras
+        for _, future in pending:
+            future.cancel()
+        for _, future in pending:
+            if not future.cancelled():
+                leftover = future.result()
+                if leftover and os.path.exists(leftover):
+                    os.remove(leftover)
+
+        collected = []
+        for item, path, future, from_manifest in accepted:
+            sections = future.result() if from_manifest else extraction_result(path, future)
+            if profiler and not from_manifest:
+                sections, events = sections
+                for event in events:
+                    profiler.record(event)
+            # Failed extractions ({"error": ...}) are not stored so they are retried next run
+            if manifest and not from_manifest and "error" not in sections:
+                manifest.record(path, sections)
+            if on_accept:
+                on_accept(item, path, sections)
+            collected.append((item, path, sections))
+
+        if manifest:
+            manifest.save()
+        return collected
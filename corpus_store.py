@@ -0,0 +1,317 @@
+import os
+import sys
+import json
+import mmap
+import zlib
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_CORPUS_DIR = ".corpus"
+BLOB_FILE = "sections.bin"
+COMPRESS_LEVEL = 1  # fastest appends; decompression speed is the same at any level
+# Ids per "IN (...)" query, well below SQLite's bound-variable limit
+ID_CHUNK = 500
+
+# =========================
+# HELPERS
+# =========================
+def paper_id(paper):
+    """Stable key for a collected paper: S2 paperId, else PDF name, else title hash."""
+    return (
+        paper.get("paperId")
+        or paper.get("pdf_file")
+        or hashlib.sha1((paper.get("title") or "").encode("utf-8")).hexdigest()
+    )
+
+def blob_generation(name):
+    """0 for sections.bin, N for sections.N.bin, None for any other file."""
+    if name == BLOB_FILE:
+        return 0
+    parts = name.split(".")
+    if len(parts) == 3 and parts[0] == "sections" and parts[1].isdigit() and parts[2] == "bin":
+        return int(parts[1])
+    return None
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# =========================
+# CORPUS STORE
+# =========================
+class CorpusStore:
+    """
+    Paper corpus split into an indexed metadata table and a section blob file.
+
+    meta.sqlite holds one row per paper (title, year, citations, pdf_file and
+    the remaining fields as JSON) plus the offset / length of its sections in
+    sections.bin, where each paper's sections are a zlib-compressed JSON blob.
+    The blob file is only ever appended to and is read through mmap, so a
+    single paper is loaded without touching the others. Re-adding a paper
+    appends a new blob and repoints its row; compact() reclaims the space.
+
+    compact() writes the live blobs to the next generation file
+    (sections.1.bin, sections.2.bin, ...) and commits the new offsets
+    together with that file's name (store table, key "blob_file"), so a
+    crash leaves either the old file and offsets or the new ones. Appends
+    and compact() hold SQLite's write lock, and reads run in one read
+    transaction, so processes sharing a corpus always agree on the file.
+    """
+
+    def __init__(self, corpus_dir=DEFAULT_CORPUS_DIR):
+        self.corpus_dir = corpus_dir
+        self.db_path = os.path.join(corpus_dir, "meta.sqlite")
+        self._map = None
+        self._lock = threading.Lock()
+
+        os.makedirs(corpus_dir, exist_ok=True)
+
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS papers (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    year INTEGER,
+                    citations INTEGER,
+                    pdf_file TEXT,
+                    record TEXT NOT NULL,
+                    offset INTEGER,
+                    length INTEGER
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS papers_year ON papers (year)")
+            db.execute("CREATE TABLE IF NOT EXISTS store (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            db.execute("INSERT OR IGNORE INTO store (key, value) VALUES ('blob_file', ?)", (BLOB_FILE,))
+            blob_file = self._blob_file(db)
+
+            # Older generations are left by a compact() that died between its
+            # commit and removing the old file. Newer ones may belong to another
+            # process's compact() in progress and are left alone; a crashed one
+            # is overwritten by the next compact().
+            current = blob_generation(blob_file)
+            for name in os.listdir(corpus_dir):
+                generation = blob_generation(name)
+                if generation is not None and generation < current:
+                    remove_file(os.path.join(corpus_dir, name))
+
+        self.blob_path = os.path.join(corpus_dir, blob_file)
+        open(self.blob_path, "ab").close()
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _blob_file(db):
+        return db.execute("SELECT value FROM store WHERE key = 'blob_file'").fetchone()[0]
+
+    def _use_blob_file(self, blob_file):
+        path = os.path.join(self.corpus_dir, blob_file)
+        if path != self.blob_path:
+            # Another process compacted the corpus
+            self.close()
+            self.blob_path = path
+
+    @contextmanager
+    def _transaction(self, write=False):
+        """
+        Connection inside one transaction, with blob_path pointing at the blob
+        file it committed. Writers take the write lock up front, so no
+        compact() can swap the file under them.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            self._use_blob_file(self._blob_file(db))
+            yield db
+
+    # ---------- section blobs ----------
+    def _read_blob(self, offset, length):
+        with self._lock:
+            # Re-map when appends have grown the file past the current view
+            if self._map is None or offset + length > len(self._map):
+                if self._map is not None:
+                    self._map.close()
+                with open(self.blob_path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            blob = self._map[offset:offset + length]
+        return json.loads(zlib.decompress(blob))
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+    # ---------- writing ----------
+    def add_papers(self, papers):
+        """Append (or replace) papers; returns their ids in order."""
+        rows = []
+        with self._transaction(write=True) as db, open(self.blob_path, "ab") as f:
+            for paper in papers:
+                record = dict(paper)
+                offset = length = None
+                if "sections" in record:
+                    # Keep the key as a placeholder so export preserves field order
+                    blob = zlib.compress(
+                        json.dumps(record["sections"], ensure_ascii=False).encode("utf-8"),
+                        COMPRESS_LEVEL
+                    )
+                    record["sections"] = None
+                    offset = f.tell()
+                    length = len(blob)
+                    f.write(blob)
+
+                rows.append((
+                    paper_id(paper), paper.get("title"), paper.get("year"),
+                    paper.get("citations"), paper.get("pdf_file"),
+                    json.dumps(record, ensure_ascii=False), offset, length
+                ))
+            # Blobs are on disk before any row points at them
+            f.flush()
+            os.fsync(f.fileno())
+
+            db.executemany("""
+                INSERT INTO papers (id, title, year, citations, pdf_file, record, offset, length)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    title = excluded.title, year = excluded.year,
+                    citations = excluded.citations, pdf_file = excluded.pdf_file,
+                    record = excluded.record, offset = excluded.offset, length = excluded.length
+            """, rows)
+        return [row[0] for row in rows]
+
+    # ---------- reading ----------
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def __contains__(self, pid):
+        with self._connect() as db:
+            return db.execute("SELECT 1 FROM papers WHERE id = ?", (pid,)).fetchone() is not None
+
+    def ids(self):
+        with self._connect() as db:
+            return [row[0] for row in db.execute("SELECT id FROM papers ORDER BY seq")]
+
+    def metadata(self, where="", params=()):
+        """
+        Paper records without sections, in insertion order. `where` is an
+        optional SQL condition on the indexed columns, e.g. "year >= ?".
+        """
+        sql = "SELECT record FROM papers" + (f" WHERE {where}" if where else "") + " ORDER BY seq"
+        with self._connect() as db:
+            records = [json.loads(row[0]) for row in db.execute(sql, params)]
+        for record in records:
+            record.pop("sections", None)
+        return records
+
+    def sections(self, pid):
+        with self._transaction() as db:
+            row = db.execute("SELECT offset, length FROM papers WHERE id = ?", (pid,)).fetchone()
+        if row is None:
+            raise KeyError(pid)
+        return None if row[0] is None else self._read_blob(*row)
+
+    def get(self, pid):
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT record, offset, length FROM papers WHERE id = ?", (pid,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(pid)
+        return self._load(row)
+
+    def _load(self, row):
+        record, offset, length = row
+        paper = json.loads(record)
+        if offset is not None:
+            paper["sections"] = self._read_blob(offset, length)
+        return paper
+
+    def iter_papers(self, ids=None):
+        """Full paper records (with sections), lazily, in insertion order or in `ids` order."""
+        with self._transaction() as db:
+            if ids is None:
+                rows = db.execute("SELECT record, offset, length FROM papers ORDER BY seq").fetchall()
+            else:
+                ids = list(ids)
+                found = {}
+                for start in range(0, len(ids), ID_CHUNK):
+                    chunk = ids[start:start + ID_CHUNK]
+                    found.update(
+                        (row[0], row[1:]) for row in db.execute(
+                            f"SELECT id, record, offset, length FROM papers "
+                            f"WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                        )
+                    )
+                rows = [found[pid] for pid in ids if pid in found]
+        for row in rows:
+            yield self._load(row)
+
+    # ---------- export / maintenance ----------
+    def export_json(self, path, ids=None, indent=2):
+        """Write papers in the dataset.json shape the collectors used to produce."""
+        papers = list(self.iter_papers(ids))
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(papers, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp, path)
+        return len(papers)
+
+    def compact(self):
+        """Rewrite the blob file without the blobs of replaced papers."""
+        moved = []
+
+        # The write lock is held until the commit: no other compact() or
+        # add_papers() runs meanwhile
+        with self._transaction(write=True) as db:
+            old_path = self.blob_path
+            new_file = f"sections.{blob_generation(os.path.basename(old_path)) + 1}.bin"
+            new_path = os.path.join(self.corpus_dir, new_file)
+            rows = db.execute(
+                "SELECT id, offset, length FROM papers WHERE offset IS NOT NULL ORDER BY offset"
+            ).fetchall()
+            with open(old_path, "rb") as src, open(new_path, "wb") as dst:
+                for pid, offset, length in rows:
+                    src.seek(offset)
+                    moved.append((dst.tell(), pid))
+                    dst.write(src.read(length))
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            # Offsets and the file they point into change in one transaction
+            db.executemany("UPDATE papers SET offset = ? WHERE id = ?", moved)
+            db.execute("UPDATE store SET value = ? WHERE key = 'blob_file'", (new_file,))
+
+        # Committed: only now is the old file unreferenced
+        self._use_blob_file(new_file)
+        remove_file(old_path)
+
+# =========================
+# ENTRY POINT
+# =========================
+if __name__ == "__main__":
+    # Import an existing dataset.json: python corpus_store.py [dataset.json] [corpus_dir]
+    dataset_file = sys.argv[1] if len(sys.argv) > 1 else "dataset.json"
+    corpus_dir = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CORPUS_DIR
+
+    with open(dataset_file, "r", encoding="utf-8") as f:
+        papers = json.load(f)
+
+    store = CorpusStore(corpus_dir)
+    store.add_papers(papers)
+    print(f"[CORPUS] {len(papers)} papers imported, {len(store)} in {corpus_dir}/")
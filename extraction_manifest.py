@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+
+# =========================
+# HELPERS
+# =========================
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_json(path, data, indent=None):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp, path)
+
+# =========================
+# EXTRACTION MANIFEST
+# =========================
+class ExtractionManifest:
+    """
+    Remembers what has already been extracted so unchanged PDFs are skipped.
+
+    manifest.json maps each PDF path to its sha256, mtime, size and the
+    extractor version that produced its result. Results are stored under
+    results/<sha256>.json, so a renamed or re-downloaded copy of the same
+    file is still a hit. A result only counts when its extractor_version
+    matches; bump the version whenever extraction logic changes.
+    """
+
+    def __init__(self, cache_dir, extractor_version):
+        self.cache_dir = cache_dir
+        self.results_dir = os.path.join(cache_dir, "results")
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.extractor_version = extractor_version
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.results_dir, exist_ok=True)
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _entry(self, pdf_path):
+        key = os.path.normpath(pdf_path)
+        stat = os.stat(pdf_path)
+        entry = self.entries.get(key)
+
+        # mtime + size unchanged -> trust the stored hash without re-reading the file
+        if not entry or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+            entry = {
+                "sha256": file_sha256(pdf_path),
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "extractor_version": None
+            }
+            self.entries[key] = entry
+        return entry
+
+    def _result_path(self, sha256):
+        return os.path.join(self.results_dir, f"{sha256}.json")
+
+    def lookup(self, pdf_path):
+        entry = self._entry(pdf_path)
+        try:
+            with open(self._result_path(entry["sha256"]), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = None
+
+        if stored and stored.get("extractor_version") == self.extractor_version:
+            entry["extractor_version"] = self.extractor_version
+            self.hits += 1
+            return stored["data"]
+
+        self.misses += 1
+        return None
+
+    def record(self, pdf_path, data):
+        entry = self._entry(pdf_path)
+        entry["extractor_version"] = self.extractor_version
+        _write_json(self._result_path(entry["sha256"]), {
+            "extractor_version": self.extractor_version,
+            "data": data
+        })
+
+    def prune(self, keep_paths):
+        keep = {os.path.normpath(p) for p in keep_paths}
+        self.entries = {k: v for k, v in self.entries.items() if k in keep}
+
+        referenced = {v["sha256"] for v in self.entries.values()}
+        for name in os.listdir(self.results_dir):
+            if name.endswith(".json") and name[:-5] not in referenced:
+                os.remove(os.path.join(self.results_dir, name))
+
+    def save(self):
+        _write_json(self.manifest_path, self.entries, indent=2)
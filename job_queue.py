@@ -0,0 +1,117 @@
+import time
+import queue
+import threading
+
+from s2_client import TokenBucket
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 32
+DEFAULT_RESULT_TTL = 600  # seconds a finished job keeps answering identical requests
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# =========================
+# JOB
+# =========================
+class Job:
+    """
+    One unit of background work shared by every session that asked for it.
+    The worker appends partial output with emit(); sessions poll
+    updates_since() and done instead of blocking on the upstream call.
+    """
+
+    def __init__(self, key, fn, args):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.updates = []
+        self.info = {}
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def emit(self, update):
+        # list.append is atomic, so readers can poll without a lock
+        self.updates.append(update)
+
+    def updates_since(self, index):
+        return self.updates[index:]
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _run(self):
+        self.state = RUNNING
+        try:
+            self.result = self.fn(self, *self.args)
+            self.state = DONE
+        except Exception as e:
+            self.error = e
+            self.state = FAILED
+        finally:
+            self.finished_at = time.monotonic()
+            self._done.set()
+
+# =========================
+# SHARED JOB QUEUE
+# =========================
+class JobQueue:
+    """
+    Bounded queue served by a fixed pool of worker threads.
+
+    Jobs with the same key are coalesced: while one is queued or running
+    (and for result_ttl seconds after it finishes) every submit() for that
+    key returns the same Job, so identical requests make one upstream call.
+    An optional token bucket (rate jobs per second, bursts up to `burst`)
+    keeps job starts within an upstream quota. submit() raises queue.Full
+    when max_pending jobs are already waiting.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 rate=None, burst=1, result_ttl=DEFAULT_RESULT_TTL):
+        self.result_ttl = result_ttl
+        self.limiter = TokenBucket(rate, burst) if rate else None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True).start()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if self.limiter:
+                self.limiter.acquire()
+            job._run()
+
+    def _expired(self, job):
+        return job.done and (job.state == FAILED or time.monotonic() - job.finished_at > self.result_ttl)
+
+    def submit(self, key, fn, *args):
+        with self._lock:
+            for old_key in [k for k, j in self._jobs.items() if self._expired(j)]:
+                del self._jobs[old_key]
+
+            job = self._jobs.get(key)
+            if job is not None:
+                return job
+
+            job = Job(key, fn, args)
+            self._queue.put_nowait(job)
+            self._jobs[key] = job
+            return job
+
+    def stats(self):
+        with self._lock:
+            states = [j.state for j in self._jobs.values()]
+        return {state: states.count(state) for state in (QUEUED, RUNNING, DONE)}
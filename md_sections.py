@@ -0,0 +1,132 @@
+import re
+
+import pymupdf
+import pymupdf4llm
+from pymupdf4llm.helpers import pymupdf_rag
+
+# =========================
+# CONFIG
+# =========================
+HEADING_PREFIXES = ("# ", "## ", "### ")
+ROOT_SECTION = "Full Text"
+PATH_SEPARATOR = " > "
+
+# =========================
+# STREAMING SECTION BUILDER
+# =========================
+class SectionBuilder:
+    """
+    Consumes markdown line by line and groups body text under its heading.
+    Fragments are collected in lists and joined once per section. Nested
+    '#', '##' and '###' headings are keyed by their full path, e.g.
+    "Method > Training".
+    """
+
+    def __init__(self):
+        self.stack = []  # [(level, title)] of the open headings
+        self.current = ROOT_SECTION
+        self.fragments = {}
+
+    def feed_line(self, line):
+        stripped = line.strip()
+        if stripped.startswith(HEADING_PREFIXES):
+            level = len(stripped) - len(stripped.lstrip("#"))
+            while self.stack and self.stack[-1][0] >= level:
+                self.stack.pop()
+            self.stack.append((level, stripped.lstrip("# ").strip()))
+            self.current = PATH_SEPARATOR.join(title for _, title in self.stack)
+        elif stripped:
+            self.fragments.setdefault(self.current, []).append(stripped)
+
+    def feed_page(self, page_markdown):
+        for line in page_markdown.splitlines():
+            self.feed_line(line)
+
+    def sections(self):
+        return {name: " ".join(parts) for name, parts in self.fragments.items()}
+
+# =========================
+# PDF -> SECTIONS
+# =========================
+# pymupdf4llm ranks heading font sizes over the whole document. Pages are
+# converted one at a time with a placeholder level per heading (PLACEHOLDER_LEVEL
+# + its index on the page); the real levels are filled in once every page's
+# heading sizes are known, so only one page of layout data is alive at a time.
+# This relies on pymupdf4llm internals (pinned in requirements.txt); when they
+# are missing or change shape, the public to_markdown(page_chunks=True) is used.
+PLACEHOLDER_LEVEL = 7
+PLACEHOLDER_RE = re.compile(rf"^(#{{{PLACEHOLDER_LEVEL},}}) ", re.MULTILINE)
+MAX_HEADER_LEVELS = 6
+
+def layout_parser():
+    """document_layout.parse_document when the layout engine and its internals are available."""
+    if not getattr(pymupdf4llm, "_use_layout", False):
+        return None
+    try:
+        # Only importable when pymupdf's layout engine is installed
+        from pymupdf4llm.helpers import document_layout
+    except ImportError:
+        return None
+    return getattr(document_layout, "parse_document", None)
+
+def iter_public_pages(pdf_path):
+    """Fallback: the whole document through the public API, then one page at a time."""
+    with pymupdf.open(pdf_path) as doc:
+        chunks = pymupdf4llm.to_markdown(doc, page_chunks=True)
+    for chunk in chunks:
+        yield chunk["text"], []
+
+def iter_markdown_pages(pdf_path):
+    """Yield (markdown, heading font sizes) for one page at a time."""
+    if getattr(pymupdf4llm, "_use_layout", None) is False:
+        with pymupdf.open(pdf_path) as doc:
+            # Without the layout engine, header levels come from one font-size scan
+            hdr_info = pymupdf_rag.IdentifyHeaders(doc)
+            for pno in range(doc.page_count):
+                yield pymupdf_rag.to_markdown(doc, pages=[pno], hdr_info=hdr_info), []
+        return
+
+    parse_document = layout_parser()
+    if parse_document is None:
+        yield from iter_public_pages(pdf_path)
+        return
+
+    with pymupdf.open(pdf_path) as doc:
+        for pno in range(doc.page_count):
+            parsed = parse_document(doc, pages=[pno], force_text=True, use_ocr=True)
+            sizes = []
+            for box in parsed.pages[0].boxes:
+                if box.boxclass in ("title", "section-header"):
+                    box.header_level = PLACEHOLDER_LEVEL + len(sizes)
+                    sizes.append(box.max_fontsize)
+            yield parsed.to_markdown(), sizes
+
+def resolve_headings(markdown, sizes, ranked):
+    """Replace placeholder levels with the document-wide level of each heading's font size."""
+    def level(match):
+        size = sizes[len(match.group(1)) - PLACEHOLDER_LEVEL]
+        return "#" * (ranked.index(size) + 1 if size >= ranked[-1] else MAX_HEADER_LEVELS) + " "
+    return PLACEHOLDER_RE.sub(level, markdown) if sizes else markdown
+
+def collect_pages(page_iter):
+    pages = []
+    sizes = set()
+    for markdown, heading_sizes in page_iter:
+        pages.append((markdown, heading_sizes))
+        sizes.update(heading_sizes)
+    return pages, sizes
+
+def build_sections(pdf_path):
+    try:
+        pages, sizes = collect_pages(iter_markdown_pages(pdf_path))
+    except (AttributeError, TypeError):
+        # The layout internals changed shape in this pymupdf4llm release
+        pages, sizes = collect_pages(iter_public_pages(pdf_path))
+
+    # Same ranking as pymupdf4llm: the largest heading sizes get levels 1..6
+    ranked = sorted(sizes, reverse=True)[:MAX_HEADER_LEVELS]
+    builder = SectionBuilder()
+    pages.reverse()
+    while pages:
+        builder.feed_page(resolve_headings(*pages.pop(), ranked))
+    return builder.sections()
@@ -0,0 +1,92 @@
+import os
+import json
+import threading
+import urllib.request
+
+from profiling import span
+
+# =========================
+# CONFIG
+# =========================
+# When set (e.g. http://127.0.0.1:8765), generation goes to a shared
+# model_server.py process instead of loading the model in this process.
+MODEL_SERVER_ENV = "MODEL_SERVER_URL"
+
+_pipelines = {}
+_tokenizers = {}
+_lock = threading.Lock()
+
+# =========================
+# LOCAL PIPELINES (LAZY, PROCESS-WIDE)
+# =========================
+def _key(task, model_name, params):
+    return (task, model_name, json.dumps(params, sort_keys=True))
+
+def get_local_pipeline(task, model_name, **params):
+    """
+    Build a transformers pipeline on first use and share it with every later
+    caller in the process. transformers itself is only imported here, so
+    importing a milestone module stays cheap.
+    """
+    key = _key(task, model_name, params)
+    with _lock:
+        if key not in _pipelines:
+            from transformers import pipeline
+
+            print(f"[INFO] Loading Hugging Face model {model_name}...")
+            with span("load_model", model=model_name):
+                _pipelines[key] = pipeline(task, model=model_name, **params)
+        return _pipelines[key]
+
+def get_tokenizer(model_name):
+    # Tokenizers are small and always loaded locally, even in model-server mode
+    with _lock:
+        if model_name not in _tokenizers:
+            from transformers import AutoTokenizer
+
+            _tokenizers[model_name] = AutoTokenizer.from_pretrained(model_name)
+        return _tokenizers[model_name]
+
+def loaded_models():
+    return [{"task": task, "model": model} for task, model, _ in _pipelines]
+
+# =========================
+# REMOTE PIPELINE (MODEL SERVER CLIENT)
+# =========================
+class RemoteGenerator:
+    """Pipeline-compatible callable that forwards prompts to model_server.py."""
+
+    def __init__(self, server_url, task, model_name, params, timeout=600):
+        self.url = server_url.rstrip("/") + "/generate"
+        self.task = task
+        self.model_name = model_name
+        self.params = params
+        self.timeout = timeout
+
+    def __call__(self, prompts, batch_size=None):
+        single = isinstance(prompts, str)
+        payload = json.dumps({
+            "task": self.task,
+            "model": self.model_name,
+            "params": self.params,
+            "prompts": [prompts] if single else list(prompts),
+            "batch_size": batch_size
+        }).encode("utf-8")
+
+        request = urllib.request.Request(
+            self.url, data=payload, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            texts = json.load(response)["outputs"]
+
+        outputs = [{"generated_text": t} for t in texts]
+        return outputs if single else [[o] for o in outputs]
+
+# =========================
+# ENTRY POINT FOR STAGES
+# =========================
+def get_generator(task, model_name, **params):
+    server_url = os.getenv(MODEL_SERVER_ENV)
+    if server_url:
+        return RemoteGenerator(server_url, task, model_name, params)
+    return get_local_pipeline(task, model_name, **params)
@@ -0,0 +1,84 @@
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from model_registry import get_local_pipeline, loaded_models
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TASK = "text2text-generation"
+
+# Pipelines are not thread-safe; requests are served one batch at a time
+_generate_lock = threading.Lock()
+
+# =========================
+# HTTP HANDLER
+# =========================
+class ModelHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send_json(404, {"error": "not found"})
+        self._send_json(200, {"status": "ok", "loaded": loaded_models()})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            return self._send_json(404, {"error": "not found"})
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            generator = get_local_pipeline(
+                request.get("task", DEFAULT_TASK),
+                request["model"],
+                **request.get("params", {})
+            )
+
+            kwargs = {}
+            if request.get("batch_size"):
+                kwargs["batch_size"] = request["batch_size"]
+
+            with _generate_lock:
+                outputs = generator(request["prompts"], **kwargs)
+
+            texts = [(o[0] if isinstance(o, list) else o)["generated_text"] for o in outputs]
+        except Exception as e:
+            return self._send_json(500, {"error": str(e)})
+
+        self._send_json(200, {"outputs": texts})
+
+    def log_message(self, format, *args):
+        pass
+
+# =========================
+# ENTRY POINT
+# =========================
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, preload=None, max_length=512):
+    if preload:
+        get_local_pipeline(DEFAULT_TASK, preload, max_length=max_length)
+
+    server = ThreadingHTTPServer((host, port), ModelHandler)
+    print(f"[INFO] Model server listening on http://{host}:{port}")
+    print(f"[INFO] Point the stages at it with MODEL_SERVER_URL=http://{host}:{port}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared local model server for drafting and review")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--preload", metavar="MODEL", help="load this model before accepting requests")
+    parser.add_argument("--max-length", type=int, default=512)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.preload, args.max_length)
@@ -1,11 +1,26 @@
 import os
-import json
-import requests
+import argparse
 import time
 from dotenv import load_dotenv
 from semanticscholar import SemanticScholar
+from semanticscholar.Paper import Paper
+from semanticscholar.SemanticScholarException import NoMorePagesException
 import pymupdf4llm
 
+from pdf_cache import PdfCache, InvalidPdfError, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DEFAULT_MAX_PDF_BYTES
+from extraction_manifest import ExtractionManifest
+from md_sections import build_sections
+from corpus_store import CorpusStore, DEFAULT_CORPUS_DIR
+from candidate_planner import CandidatePlanner
+from collection_journal import CollectionJournal
+from topic_batch import read_topics, collect_topics, DEFAULT_TOPIC_MAP_FILE
+from s2_client import get_client
+import profiling
+from collector_pool import (
+    run_pipeline, worker_pools, worker_count,
+    DEFAULT_DOWNLOAD_WORKERS, DEFAULT_EXTRACT_WORKERS
+)
+
 load_dotenv()
 
 S2_API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
@@ -15,120 +30,253 @@ PAPERS_FOLDER = "papers"
 DATASET_FILE = "dataset.json"
 os.makedirs(PAPERS_FOLDER, exist_ok=True)
 
+# Re-runs revalidate cached PDFs (ETag / Last-Modified) instead of downloading again
+PDF_CACHE = PdfCache(
+    os.getenv("PDF_CACHE_DIR", DEFAULT_CACHE_DIR),
+    int(os.getenv("PDF_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+    int(os.getenv("PDF_MAX_DOWNLOAD_MB", DEFAULT_MAX_PDF_BYTES // (1024 * 1024))) * 1024 * 1024
+)
+
+# Skip re-running pymupdf4llm on PDFs that were already extracted
+# (bump the suffix whenever extract_sections changes its output)
+EXTRACTOR_VERSION = f"pymupdf4llm-{pymupdf4llm.__version__}/sections-2"
+EXTRACTION_MANIFEST = ExtractionManifest(".extract_cache", EXTRACTOR_VERSION)
+
+# Collected papers accumulate in the corpus store; dataset.json is an export of this run
+CORPUS = CorpusStore(os.getenv("CORPUS_DIR", DEFAULT_CORPUS_DIR))
+
 MAX_SUCCESSFUL_PAPERS = 10  # As per your project (adjustable)
+MAX_SEARCH_RETRIES = 3
+SEARCH_FIELDS = ['title', 'authors', 'year', 'abstract', 'openAccessPdf', 'citationCount', 'externalIds']
+
+# Parallel downloads / extraction processes (set both to 1 for a one-at-a-time run)
+DOWNLOAD_WORKERS = worker_count("DOWNLOAD_WORKERS", DEFAULT_DOWNLOAD_WORKERS)
+EXTRACT_WORKERS = worker_count("EXTRACT_WORKERS", DEFAULT_EXTRACT_WORKERS)
+
+def accept_best(planner: CandidatePlanner, successful_papers: list, journal: CollectionJournal | None = None,
+                pools=None, shared: set | None = None) -> None:
+    def accept(item, pdf_path: str, sections: dict) -> None:
+        paper = {
+            "paperId": item.paperId,
+            "title": item.title,
+            "authors": [a['name'] for a in item.authors],
+            "year": item.year,
+            "abstract": item.abstract or "No abstract",
+            "citations": item.citationCount or 0,
+            "pdf_file": os.path.basename(pdf_path),
+            "sections": sections
+        }
+        successful_papers.append(paper)
+        # Checkpoint: stored in the corpus first, then recorded in the journal
+        if journal:
+            journal.record_paper(CORPUS.add_papers([paper])[0], item.raw_data)
+        print(f"  Added! ({len(successful_papers)}/{MAX_SUCCESSFUL_PAPERS})\n")
+    
+    # Download the highest-scoring pooled candidates until the goal is met
+    while planner and len(successful_papers) < MAX_SUCCESSFUL_PAPERS:
+        needed = MAX_SUCCESSFUL_PAPERS - len(successful_papers)
+        candidates = planner.take(needed)
+        
+        # Already collected for an earlier topic of this batch: no download or extraction
+        reused = [item for item in candidates if shared and item.paperId in shared]
+        for item in reused:
+            successful_papers.append(CORPUS.get(item.paperId))
+            if journal:
+                journal.record_paper(item.paperId, item.raw_data)
+            print(f"  Reused from an earlier topic: {item.title} ({len(successful_papers)}/{MAX_SUCCESSFUL_PAPERS})\n")
+        
+        run_pipeline(
+            [item for item in candidates if item not in reused],
+            download_candidate,
+            place_pdf,
+            extract_sections,
+            needed=needed - len(reused),
+            download_workers=DOWNLOAD_WORKERS,
+            extract_workers=EXTRACT_WORKERS,
+            manifest=EXTRACTION_MANIFEST,
+            on_accept=accept,
+            pools=pools
+        )
+        if journal:
+            # An interrupted download keeps its partial: leave it untried so a resume finishes it
+            journal.record_tried([
+                item.raw_data for item in candidates
+                if not PDF_CACHE.has_partial(item.paperId, item.openAccessPdf['url'])
+            ])
 
-def collect_successful_papers(topic: str):
+def collect_successful_papers(topic: str, journal: CollectionJournal | None = None,
+                              pools=None, shared: set | None = None):
     print(f"\n Searching for: '{topic}'")
     print(f"   Goal: Find up to {MAX_SUCCESSFUL_PAPERS} papers with downloadable open-access PDFs\n")
     
     successful_papers = []
-    fetched = 0
     batch_size = 50  # Larger batch to increase chance of finding open-access ones
     
+    # De-duplicated open-access candidates from every page, best first
+    planner = CandidatePlanner(topic, to_dict=lambda item: item.raw_data)
+    results = None
+    seen_items = 0
+    failures = 0
+    finished = False
+    # The library cannot start a search at an offset: on resume, pages that
+    # were journaled are fetched again but not re-added
+    resume_offset = 0
+    
+    if journal:
+        successful_papers = list(CORPUS.iter_papers(journal.paper_ids))
+        if journal.done:
+            print(f"   Already collected ({len(successful_papers)} papers); run with --fresh to start over")
+            return successful_papers
+        journal.restore(planner, wrap=Paper)
+        resume_offset = journal.next_offset
+        if journal.resumed:
+            print(f"   Resuming: {len(successful_papers)} papers collected, {len(planner)} candidates pooled\n")
+            if planner.ready(MAX_SUCCESSFUL_PAPERS - len(successful_papers)):
+                accept_best(planner, successful_papers, journal, pools, shared)
+    
     while len(successful_papers) < MAX_SUCCESSFUL_PAPERS:
         try:
-            print(f"   Fetching {batch_size} papers (total fetched: {fetched})...")
-            results = list(sch.search_paper(
-                query=topic,
-                limit=batch_size,
-                fields=['title', 'authors', 'year', 'abstract', 'openAccessPdf', 'citationCount']
-            ))
-            
-            if not results:
-                print("   No more results available.\n")
-                break
-            
-            fetched += len(results)
-            
-            for item in results:
-                if len(successful_papers) >= MAX_SUCCESSFUL_PAPERS:
-                    break
-                
-                pdf_url = item.openAccessPdf['url'] if item.openAccessPdf else None
-                if not pdf_url:
-                    continue  # Skip if no open-access PDF
-                
-                title = item.title
-                print(f"   Trying: {title} ({item.year})")
-                
-                pdf_path = download_pdf(pdf_url, f"{len(successful_papers)+1}_{title}")
-                if pdf_path:
-                    sections = extract_sections(pdf_path)
-                    
-                    paper = {
-                        "title": title,
-                        "authors": [a['name'] for a in item.authors],
-                        "year": item.year,
-                        "abstract": item.abstract or "No abstract",
-                        "citations": item.citationCount or 0,
-                        "pdf_file": os.path.basename(pdf_path),
-                        "sections": sections
-                    }
-                    successful_papers.append(paper)
-                    print(f"  Added! ({len(successful_papers)}/{MAX_SUCCESSFUL_PAPERS})\n")
-            
-            time.sleep(2)  # Be gentle on API
-            
+            # One request per page: iterating the results object directly
+            # would fetch every remaining page up front
+            with profiling.span("search"):
+                # The library does its own HTTP; pace it with the shared S2 rate limiter
+                get_client().limiter.acquire()
+                if results is None:
+                    results = sch.search_paper(
+                        query=topic,
+                        limit=batch_size,
+                        fields=SEARCH_FIELDS,
+                        open_access_pdf=True
+                    )
+                else:
+                    results.next_page()
+        except NoMorePagesException:
+            print("   No more results available.\n")
+            finished = True
+            break
         except Exception as e:
+            failures += 1
+            if failures > MAX_SEARCH_RETRIES:
+                break
             print(f"   Temporary error: {e}. Waiting 10 seconds...\n")
             time.sleep(10)
+            continue
+        
+        page = results.items[seen_items:]
+        seen_items = len(results.items)
+        print(f"   Fetched {len(page)} papers (total fetched: {seen_items})...")
+        if not page:
+            print("   No more results available.\n")
+            finished = True
+            break
+        if results.offset < resume_offset:
+            continue
+        
+        planner.add(page, results.offset)
+        if journal:
+            journal.record_page(results.offset, [item.raw_data for item in page], results.offset + batch_size)
+        
+        # Pool a few pages' worth before downloading, so the best are tried first
+        if planner.ready(MAX_SUCCESSFUL_PAPERS - len(successful_papers)):
+            accept_best(planner, successful_papers, journal, pools, shared)
+    
+    # Search exhausted: try whatever is left in the pool
+    accept_best(planner, successful_papers, journal, pools, shared)
+    if journal and (finished or len(successful_papers) >= MAX_SUCCESSFUL_PAPERS):
+        journal.record_done()
+    print(f"   Skipped {planner.duplicates} duplicates and {planner.closed_access} papers without an open PDF")
     
     return successful_papers
 
-def download_pdf(pdf_url: str, title_prefix: str) -> str | None:
+def download_candidate(item, idx: int) -> str | None:
+    print(f"   Trying: {item.title} ({item.year})")
+    return download_pdf(item.openAccessPdf['url'], f"_tmp_{idx}", item.paperId)
+
+def place_pdf(item, tmp_path: str, n: int) -> str:
+    # Final name depends on acceptance order, so it is assigned after download
+    path = pdf_path_for(f"{n}_{item.title}")
+    os.replace(tmp_path, path)
+    return path
+
+def pdf_path_for(title_prefix: str) -> str:
     safe_title = "".join(c if c.isalnum() or c in " _-" else "_" for c in title_prefix)[:100]
     filename = f"{safe_title}.pdf"
-    path = os.path.join(PAPERS_FOLDER, filename)
+    return os.path.join(PAPERS_FOLDER, filename)
+
+def download_pdf(pdf_url: str, title_prefix: str, paper_id: str | None = None) -> str | None:
+    path = pdf_path_for(title_prefix)
     
     try:
         headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(pdf_url, stream=True, timeout=120, headers=headers)
-        if response.status_code == 200:
-            with open(path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            return path
+        cached = PDF_CACHE.fetch(paper_id, pdf_url, headers=headers, timeout=120)
+        return PDF_CACHE.materialize(cached, path)
+    except InvalidPdfError as e:
+        print(f"   Rejected: {e}")
     except:
         pass
     return None
 
 def extract_sections(pdf_path: str) -> dict:
     try:
-        md_text = pymupdf4llm.to_markdown(pdf_path)
-        sections = {}
-        current = "Full Text"
-        for line in md_text.split("\n"):
-            stripped = line.strip()
-            if stripped.startswith(("# ", "## ", "### ")):
-                current = stripped.lstrip("# ").strip()
-            elif stripped:
-                sections.setdefault(current, "")
-                sections[current] += stripped + " "
-        for k in sections:
-            sections[k] = sections[k].strip()
-        return sections
+        # Streams pymupdf4llm output page by page, keeping the heading hierarchy
+        return build_sections(pdf_path)
     except:
         return {"error": "Failed to extract"}
 
 if __name__ == "__main__":
+    # --profile[=trace.json] reports download / extract timings on exit
+    profiling.start_from_argv()
+    parser = argparse.ArgumentParser(description="Collect open-access papers with full text")
+    parser.add_argument("--topics", metavar="FILE",
+                        help="collect every topic in FILE (one per line) in a single run")
+    parser.add_argument("--fresh", action="store_true",
+                        help="ignore earlier journals and collect the topic(s) from scratch")
+    args = parser.parse_args()
     print(" AI Paper Reviewer  Smart Open-Access Collection (Max 10 Successful Papers)\n")
     
-    topic = input("Enter research topic: ").strip()
-    if not topic:
-        topic = "attention is all you need"  # Best test topic
-    
-    papers = collect_successful_papers(topic)
+    if args.topics:
+        # All topics in one process, sharing the worker pools, the S2 rate limiter and the PDF / extraction caches
+        with worker_pools(DOWNLOAD_WORKERS, EXTRACT_WORKERS) as pools:
+            topic_map = collect_topics(
+                read_topics(args.topics),
+                lambda topic, journal, shared: collect_successful_papers(topic, journal, pools, shared),
+                CORPUS, DATASET_FILE, fresh=args.fresh
+            )
+        papers = list(CORPUS.iter_papers(list(dict.fromkeys(
+            pid for ids in topic_map.values() for pid in ids
+        ))))
+    else:
+        topic = input("Enter research topic: ").strip()
+        if not topic:
+            topic = "attention is all you need"  # Best test topic
+        
+        # Each accepted paper is checkpointed; re-running the same topic resumes
+        journal = CollectionJournal(topic, fresh=args.fresh)
+        papers = collect_successful_papers(topic, journal)
+        if papers:
+            # Save dataset
+            CORPUS.export_json(DATASET_FILE, journal.paper_ids)
     
     if not papers:
         print("Could not find any papers with downloadable PDFs. Try a different topic.")
     else:
-        # Save dataset
-        dataset_path = os.path.join(os.getcwd(), DATASET_FILE)
-        with open(DATASET_FILE, "w", encoding="utf-8") as f:
-            json.dump(papers, f, indent=2, ensure_ascii=False)
-        
         print(f" SUCCESS!")
+        if args.topics:
+            print(f"   • Covered {len(topic_map)} topics (topic → papers in {DEFAULT_TOPIC_MAP_FILE})")
         print(f"   • Collected {len(papers)} high-quality papers with full text")
         print(f"   • PDFs saved in: {PAPERS_FOLDER}/")
+        print(f"   • PDF cache: {PDF_CACHE.hits} hits, {PDF_CACHE.downloads} downloads")
+        print(f"   • Extraction reused: {EXTRACTION_MANIFEST.hits}/{len(papers)}")
+        print(f"   • Corpus: {len(CORPUS)} papers in {CORPUS.corpus_dir}/")
         print(f"   • Dataset saved: {DATASET_FILE}")
+        
+        # Incrementally embed the sections of new or changed papers
+        try:
+            from vector_index import SectionIndex
+            print(f"   • Vector index: {SectionIndex().index_papers(papers)} papers embedded")
+        except ImportError:
+            print("   • Vector index skipped (chromadb / sentence-transformers not installed)")
+        except Exception as e:
+            # e.g. the embedding model could not be downloaded; the dataset is already saved
+            print(f"   • Vector index failed: {e}")
         print("\nReady for Milestone 3: LLM Analysis & Draft Generation!")
\ No newline at end of file
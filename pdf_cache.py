@@ -0,0 +1,355 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+import requests
+
+from profiling import span
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_CACHE_DIR = ".pdf_cache"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+DEFAULT_MAX_PDF_BYTES = 100 * 1024 * 1024  # per download
+CHUNK_SIZE = 1024 * 1024
+# Partial downloads nobody resumed within this time are dropped
+PARTIAL_MAX_AGE = 7 * 24 * 3600
+WRITE_BUFFER = 4 * 1024 * 1024
+
+# The PDF header may be preceded by up to 1 KB of junk
+PDF_MAGIC = b"%PDF-"
+MAGIC_WINDOW = 1024
+# Paywalls and landing pages announce themselves before any body is read
+REJECTED_CONTENT_TYPES = ("text/html", "application/xhtml", "text/plain", "application/json")
+CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-")
+
+class InvalidPdfError(ValueError):
+    """The response is not a PDF, or is larger than the download cap."""
+
+# =========================
+# CONTENT-ADDRESSED PDF CACHE
+# =========================
+class PdfCache:
+    """
+    On-disk PDF cache keyed by paperId, storing each file once under its
+    SHA-256. Entries remember the server's ETag / Last-Modified so later runs
+    revalidate with a conditional GET instead of downloading again. The
+    least recently used entries are evicted once the store exceeds max_bytes.
+
+    Interrupted downloads are kept under partial/ and resumed with an HTTP
+    Range request (guarded by If-Range, so a file that changed on the server
+    is downloaded whole again). A 416, or a 206 that does not start where
+    the partial ends, drops the partial and downloads the file once more
+    without a range. Partials count towards max_bytes, are evicted before
+    cached PDFs, and expire after PARTIAL_MAX_AGE.
+
+    Downloads are checked as they arrive: a non-PDF Content-Type or a
+    Content-Length above max_pdf_bytes is rejected from the headers alone,
+    a first chunk without the %PDF magic stops the transfer, and bodies
+    that grow past max_pdf_bytes are aborted. All raise InvalidPdfError.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_pdf_bytes=DEFAULT_MAX_PDF_BYTES):
+        self.cache_dir = cache_dir
+        self.max_pdf_bytes = max_pdf_bytes
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.partial_dir = os.path.join(cache_dir, "partial")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.downloads = 0
+        self._lock = threading.Lock()
+        self._active = set()  # partial paths being written right now
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    # ---------- index ----------
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, f"{sha256}.pdf")
+
+    # ---------- lookup / download ----------
+    def fetch(self, paper_id, url, headers=None, timeout=60, session=None):
+        """
+        Return the path of the cached PDF for paper_id, downloading it only
+        when it is missing or the server reports a change. HTTP errors are
+        raised like requests' raise_for_status(); responses that are not a
+        PDF or exceed max_pdf_bytes raise InvalidPdfError.
+        """
+        key = paper_id or url
+        http = session or requests
+        request_headers = dict(headers or {})
+
+        with self._lock:
+            entry = self.index.get(key)
+            if entry and (entry["url"] != url or not os.path.exists(self.object_path(entry["sha256"]))):
+                entry = None
+
+        if entry and not entry.get("etag") and not entry.get("last_modified"):
+            # Nothing to revalidate against; open-access PDFs are immutable in practice
+            return self._hit(key, entry)
+
+        # Keep eviction away from the partial this download resumes or writes
+        partial = self.partial_path(key)
+        with self._lock:
+            self._active.add(partial)
+        try:
+            return self._download(key, url, entry, http, request_headers, timeout)
+        finally:
+            with self._lock:
+                self._active.discard(partial)
+
+    def _download(self, key, url, entry, http, request_headers, timeout):
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+            resume_from = 0
+        else:
+            resume_from = self._resume_headers(key, url, request_headers)
+
+        with span("download", revalidate=bool(entry), resumed=resume_from) as timing:
+            response = http.get(url, stream=True, timeout=timeout, headers=request_headers)
+            try:
+                if entry and response.status_code == 304:
+                    return self._hit(key, entry)
+                if resume_from and not self._resumes_at(response, resume_from):
+                    # The partial no longer fits the file: drop it and download it whole
+                    response.close()
+                    self._discard_partial(key)
+                    del request_headers["Range"], request_headers["If-Range"]
+                    resume_from = 0
+                    response = http.get(url, stream=True, timeout=timeout, headers=request_headers)
+                response.raise_for_status()
+                # 200 instead of 206: the server ignored the range or the file changed
+                if response.status_code != 206:
+                    resume_from = 0
+                self._check_headers(response, resume_from)
+                path, received = self._store(key, url, response, resume_from)
+                timing.add(bytes=received)
+                return path
+            finally:
+                response.close()
+
+    def _hit(self, key, entry):
+        with self._lock:
+            entry["last_access"] = time.time()
+            self.hits += 1
+            self._save_index()
+        return self.object_path(entry["sha256"])
+
+    @staticmethod
+    def _resumes_at(response, resume_from):
+        """False for a 416, or a 206 whose Content-Range does not start at resume_from."""
+        if response.status_code == 416:
+            return False
+        if response.status_code != 206:
+            return True
+        match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+        return bool(match) and int(match.group(1)) == resume_from
+
+    def _check_headers(self, response, resume_from=0):
+        content_type = response.headers.get("Content-Type", "").lower()
+        if content_type.startswith(REJECTED_CONTENT_TYPES):
+            raise InvalidPdfError(f"not a PDF (Content-Type: {content_type})")
+
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and resume_from + int(length) > self.max_pdf_bytes:
+            raise InvalidPdfError(f"PDF too large ({(resume_from + int(length)) // (1024 * 1024)} MB)")
+
+    @staticmethod
+    def _check_magic(head):
+        if PDF_MAGIC not in head[:MAGIC_WINDOW]:
+            raise InvalidPdfError("response does not start with a PDF header")
+
+    def _store(self, key, url, response, resume_from=0):
+        digest = hashlib.sha256()
+        tmp_path = self.partial_path(key)
+        size = 0
+        head = b""
+
+        if resume_from:
+            # Hash what is already on disk, then append the rest
+            with open(tmp_path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    if len(head) < MAGIC_WINDOW:
+                        head += chunk[:MAGIC_WINDOW]
+                    size += len(chunk)
+        else:
+            self._save_partial_meta(key, url, response)
+
+        try:
+            with open(tmp_path, "ab" if resume_from else "wb", buffering=WRITE_BUFFER) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+
+                    # Usually decided by the first chunk; a tiny one is accumulated
+                    if head is not None:
+                        head += chunk[:MAGIC_WINDOW]
+                        if len(head) >= MAGIC_WINDOW:
+                            self._check_magic(head)
+                            head = None
+                    if size > self.max_pdf_bytes:
+                        raise InvalidPdfError(f"PDF larger than {self.max_pdf_bytes // (1024 * 1024)} MB")
+
+                if head is not None:
+                    self._check_magic(head)
+        except InvalidPdfError:
+            self._discard_partial(key)
+            raise
+        # Any other failure (network error, interrupt) keeps the partial for a Range resume
+
+        sha256 = digest.hexdigest()
+        path = self.object_path(sha256)
+
+        with self._lock:
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+            self._discard_partial(key)
+
+            self.index[key] = {
+                "url": url,
+                "sha256": sha256,
+                "size": size,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "last_access": time.time()
+            }
+            self.downloads += 1
+            self._evict(keep=key)
+            self._save_index()
+
+        return path, size - resume_from
+
+    # ---------- partial downloads ----------
+    def partial_path(self, key):
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.partial_dir, f"{name}.part")
+
+    def _save_partial_meta(self, key, url, response):
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        with open(self.partial_path(key) + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def has_partial(self, paper_id, url=None):
+        """True when an interrupted download of this paper can be resumed."""
+        return os.path.exists(self.partial_path(paper_id or url))
+
+    def _resume_headers(self, key, url, request_headers):
+        """Add Range / If-Range for a usable partial download; returns the bytes already on disk."""
+        part = self.partial_path(key)
+        try:
+            with open(part + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            size = os.path.getsize(part)
+        except (OSError, ValueError):
+            return 0
+
+        # If-Range needs a strong ETag or a date; without one the resume could splice two versions
+        etag = meta.get("etag") or ""
+        validator = etag if etag and not etag.startswith("W/") else meta.get("last_modified")
+        if meta.get("url") != url or not validator or not size:
+            self._discard_partial(key)
+            return 0
+
+        request_headers["Range"] = f"bytes={size}-"
+        request_headers["If-Range"] = validator
+        return size
+
+    def _discard_partial(self, key):
+        for path in (self.partial_path(key), self.partial_path(key) + ".json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _partials(self):
+        """(mtime, size, path) of every partial download not being written, oldest first."""
+        partials = []
+        for name in os.listdir(self.partial_dir):
+            path = os.path.join(self.partial_dir, name)
+            if not name.endswith(".part") or path in self._active:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            partials.append((stat.st_mtime, stat.st_size, path))
+        return sorted(partials)
+
+    # ---------- eviction ----------
+    def _evict(self, keep):
+        sizes = {}
+        for entry in self.index.values():
+            sizes[entry["sha256"]] = entry["size"]
+        total = sum(sizes.values())
+
+        # Partials go first: stale ones always, then the oldest while over budget
+        expired = time.time() - PARTIAL_MAX_AGE
+        partials = self._partials()
+        total += sum(size for _, size, _ in partials)
+        for mtime, size, path in partials:
+            if total <= self.max_bytes and mtime >= expired:
+                continue
+            total -= size
+            for stale in (path, path + ".json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+        by_age = sorted(self.index.items(), key=lambda kv: kv[1]["last_access"])
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            del self.index[key]
+            sha256 = entry["sha256"]
+            if not any(e["sha256"] == sha256 for e in self.index.values()):
+                total -= sizes[sha256]
+                try:
+                    os.remove(self.object_path(sha256))
+                except OSError:
+                    pass
+
+    # ---------- working copies ----------
+    @staticmethod
+    def materialize(cached_path, dest_path):
+        # Hard link when possible so papers/ costs no extra disk space
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(cached_path, dest_path)
+        except OSError:
+            shutil.copyfile(cached_path, dest_path)
+        return dest_path
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from contextvars import ContextVar
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_TRACE_FILE = "profile_trace.json"
+COUNTERS = ("bytes", "tokens")
+
+# =========================
+# PROFILER
+# =========================
+class Profiler:
+    """
+    Collects timed spans (name, start, duration, thread, counters such as
+    bytes / tokens) and reports them as a summary table or a Chrome trace
+    (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self):
+        """Per span name: count, total / mean seconds and summed counters."""
+        rows = {}
+        for event in self.events:
+            row = rows.setdefault(event["name"], {"name": event["name"], "count": 0, "seconds": 0.0})
+            row["count"] += 1
+            row["seconds"] += event["dur"] / 1e6
+            for key in COUNTERS:
+                if key in event["args"]:
+                    row[key] = row.get(key, 0) + event["args"][key]
+
+        result = sorted(rows.values(), key=lambda r: r["seconds"], reverse=True)
+        for row in result:
+            row["mean"] = row["seconds"] / row["count"]
+        return result
+
+    def format_summary(self):
+        lines = [f"{'span':<12} {'count':>6} {'total s':>9} {'mean s':>9} {'bytes':>12} {'tokens':>9}"]
+        for row in self.summary():
+            lines.append(
+                f"{row['name']:<12} {row['count']:>6} {row['seconds']:>9.3f} {row['mean']:>9.3f} "
+                f"{row.get('bytes', ''):>12} {row.get('tokens', ''):>9}"
+            )
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        trace = {
+            "traceEvents": [
+                {"name": e["name"], "cat": "pipeline", "ph": "X", "ts": e["ts"], "dur": e["dur"],
+                 "pid": e["pid"], "tid": e["tid"], "args": e["args"]}
+                for e in self.events
+            ],
+            "displayTimeUnit": "ms"
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+
+# =========================
+# SPANS
+# =========================
+class Span:
+    __slots__ = ("profiler", "name", "args", "start")
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def add(self, **counts):
+        for key, value in counts.items():
+            self.args[key] = self.args.get(key, 0) + value
+
+    def __enter__(self):
+        # Wall-clock microseconds, so spans from worker processes line up
+        self.start = time.time_ns() // 1000
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.event())
+        return False
+
+    def event(self):
+        return {
+            "name": self.name, "ts": self.start, "dur": time.time_ns() // 1000 - self.start,
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": self.args
+        }
+
+class _NullSpan:
+    """Returned while profiling is off: entering, adding and leaving do nothing."""
+    __slots__ = ()
+
+    def add(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+# A process-wide profiler for the CLI scripts; the context variable scopes
+# one to a single Streamlit run without leaking into other sessions
+_global = None
+_current = ContextVar("profiler", default=None)
+
+def active():
+    return _current.get() or _global
+
+def span(name, **args):
+    profiler = _current.get() or _global
+    if profiler is None:
+        return NULL_SPAN
+    return Span(profiler, name, args)
+
+class profile:
+    """Profile only the enclosed block (and this thread's context)."""
+
+    def __enter__(self):
+        self.profiler = Profiler()
+        self._token = _current.set(self.profiler)
+        return self.profiler
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+        return False
+
+# =========================
+# WORKER PROCESSES
+# =========================
+def run_traced(name, fn, *args):
+    """
+    Run fn(*args) in a worker process under a span and return (result,
+    events) including any nested spans; the parent records the events,
+    since worker processes have no profiler of their own.
+    """
+    recorder = Profiler()
+    token = _current.set(recorder)
+    try:
+        with Span(recorder, name, {}):
+            result = fn(*args)
+    finally:
+        _current.reset(token)
+    return result, recorder.events
+
+# =========================
+# CLI SUPPORT
+# =========================
+def start(trace_path=DEFAULT_TRACE_FILE):
+    """Enable the process-wide profiler and report when the script exits."""
+    global _global
+    _global = Profiler()
+    atexit.register(report, _global, trace_path)
+    return _global
+
+def report(profiler, trace_path):
+    profiler.write_chrome_trace(trace_path)
+    print("\n[PROFILE]")
+    print(profiler.format_summary())
+    print(f"[PROFILE] Chrome trace saved to {trace_path}")
+
+def start_from_argv(argv=None):
+    """
+    For scripts without argparse: `--profile` or `--profile=trace.json`
+    anywhere in argv turns profiling on (and is removed from sys.argv).
+    """
+    argv = sys.argv if argv is None else argv
+    for arg in list(argv[1:]):
+        if arg == "--profile" or arg.startswith("--profile="):
+            argv.remove(arg)
+            return start(arg.partition("=")[2] or DEFAULT_TRACE_FILE)
+    return None
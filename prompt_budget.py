@@ -0,0 +1,101 @@
+import re
+import math
+
+# =========================
+# CONFIG
+# =========================
+CHARS_PER_TOKEN = 4  # Gemini averages ~4 characters of English per token
+MIN_SUMMARY_TOKENS = 40
+ITEM_OVERHEAD_TOKENS = 8  # JSON keys, quotes and separators per packed item
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into",
+    "is", "of", "on", "or", "the", "to", "with", "we", "this", "that", "using"
+}
+
+# =========================
+# TOKEN MEASUREMENT
+# =========================
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to about max_tokens, at a sentence boundary when one fits."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    limit = max_tokens * CHARS_PER_TOKEN
+    kept = ""
+    for sentence in SENTENCE_RE.split(text):
+        candidate = f"{kept} {sentence}".strip()
+        if len(candidate) > limit:
+            break
+        kept = candidate
+
+    # No whole sentence fits: fall back to a word boundary
+    if not kept:
+        kept = text[:limit].rsplit(" ", 1)[0]
+    return kept.rstrip() + " …"
+
+# =========================
+# RELEVANCE & DEDUPLICATION
+# =========================
+def terms(text):
+    return {w for w in WORD_RE.findall(text.lower()) if w not in STOPWORDS}
+
+def relevance(topic_terms, text):
+    """Share of the topic's terms that occur in text."""
+    if not topic_terms:
+        return 0.0
+    return len(topic_terms & terms(text)) / len(topic_terms)
+
+def dedupe(items, key="title"):
+    seen = set()
+    unique = []
+    for item in items:
+        norm = " ".join(WORD_RE.findall((item.get(key) or "").lower()))
+        if norm and norm in seen:
+            continue
+        seen.add(norm)
+        unique.append(item)
+    return unique
+
+# =========================
+# PACKING
+# =========================
+def pack(topic, items, budget, text_key="summary", dedupe_key="title", min_tokens=MIN_SUMMARY_TOKENS):
+    """
+    Fit items ({"title": ..., text_key: ...}) into `budget` estimated tokens.
+
+    Duplicates (same normalised dedupe_key) are dropped and the rest ranked by relevance to the
+    topic. The least relevant items are left out when the budget cannot
+    give each at least min_tokens; in ranked order, every kept item may then
+    use an equal share of what is left, so short texts leave room for the
+    ones after them.
+    Returns (packed items in ranked order, tokens used, items dropped).
+    """
+    topic_terms = terms(topic)
+    ranked = sorted(
+        dedupe(items, dedupe_key),
+        key=lambda it: relevance(topic_terms, f"{it.get('title') or ''} {it.get(text_key) or ''}"),
+        reverse=True
+    )
+
+    fixed = [estimate_tokens(it.get("title") or "") + ITEM_OVERHEAD_TOKENS for it in ranked]
+
+    # Keep only as many items as can each get at least min_tokens of text
+    count = len(ranked)
+    while count and sum(fixed[:count]) + count * min_tokens > budget:
+        count -= 1
+
+    packed, used = [], 0
+    for i, item in enumerate(ranked[:count]):
+        share = (budget - used) // (count - i) - fixed[i]
+        text = truncate_to_tokens(item.get(text_key) or "", share)
+        packed.append({**item, text_key: text})
+        used += fixed[i] + estimate_tokens(text)
+
+    return packed, used, len(items) - len(packed)
@@ -0,0 +1,190 @@
+import os
+import copy
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+from profiling import span
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_BASE_URL = "https://api.semanticscholar.org/graph/v1"
+USER_AGENT = "Mozilla/5.0"
+
+# Requests per second: keyed access is granted 1 req/s; anonymous traffic
+# shares a global pool, so stay well below that without a key
+KEYED_RATE = 1.0
+ANONYMOUS_RATE = 0.3
+
+MAX_RETRIES = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+# Someone is waiting on the page (app.py): fail fast rather than back off for a minute
+INTERACTIVE_MAX_RETRIES = 2
+INTERACTIVE_MAX_BACKOFF = 5.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# =========================
+# RATE LIMITER
+# =========================
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# =========================
+# CLIENT
+# =========================
+class SemanticScholarClient:
+    """
+    Semantic Scholar Graph API client with one pooled HTTP session, a shared
+    token-bucket rate limiter and 429/5xx retries with exponential backoff
+    and full jitter (Retry-After is honoured when present).
+    """
+
+    def __init__(self, api_key=None, base_url=DEFAULT_BASE_URL, rate=None,
+                 max_retries=MAX_RETRIES, max_backoff=MAX_BACKOFF, pool_size=10, timeout=20):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate or (KEYED_RATE if api_key else ANONYMOUS_RATE))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+        if api_key:
+            self.session.headers["x-api-key"] = api_key
+
+    def with_retries(self, max_retries, max_backoff):
+        """Copy with its own retry policy, sharing this client's session and rate limiter."""
+        client = copy.copy(self)
+        client.max_retries = max_retries
+        client.max_backoff = max_backoff
+        return client
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after and retry_after.isdigit():
+            return min(self.max_backoff, float(retry_after))
+        return random.uniform(0, min(self.max_backoff, BASE_BACKOFF * 2 ** attempt))
+
+    def get(self, path, params=None, cancel=None):
+        """
+        GET path and return the decoded JSON. `cancel` (a threading.Event)
+        abandons the call: once it is set, no further attempt is sent, the
+        backoff wait ends early and None is returned.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        wait = cancel.wait if cancel else time.sleep
+
+        # One span per call, including rate-limit waits and retries
+        with span("search", path=path) as timing:
+            for attempt in range(self.max_retries + 1):
+                self.limiter.acquire()
+                if cancel and cancel.is_set():
+                    return None
+                try:
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.max_retries:
+                        raise
+                    wait(self._backoff(attempt))
+                    continue
+
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                    print(f"[S2] HTTP {response.status_code}, retrying in {delay:.1f}s")
+                    wait(delay)
+                    continue
+
+                response.raise_for_status()
+                timing.add(bytes=len(response.content))
+                return response.json()
+
+    # ---------- paper search ----------
+    def search_page(self, query, limit=50, offset=0, fields=None, cancel=None):
+        params = {"query": query, "limit": limit, "offset": offset}
+        if fields:
+            params["fields"] = fields
+        return self.get("paper/search", params, cancel)
+
+    def search(self, query, limit=50, offset=0, fields=None):
+        return self.search_page(query, limit, offset, fields).get("data", [])
+
+    def iter_search_pages(self, query, page_size=50, offset=0, fields=None, want_more=None):
+        """
+        Yield (offset, papers) page by page. The next page is requested in
+        the background while the caller works on the current one, unless
+        want_more() returns False (the caller's goal is met); a page that
+        was not prefetched is requested when the caller asks for it.
+        Closing the generator abandons an in-flight prefetch without
+        waiting for it, and stops its retries.
+        """
+        cancel = threading.Event()
+        prefetcher = ThreadPoolExecutor(max_workers=1)
+        future = None
+        try:
+            while True:
+                page = future.result() if future else self.search_page(query, page_size, offset, fields)
+                papers = page.get("data", [])
+                next_offset = page.get("next")
+
+                future = None
+                if papers and next_offset is not None and (want_more is None or want_more()):
+                    future = prefetcher.submit(self.search_page, query, page_size, next_offset, fields, cancel)
+
+                yield offset, papers
+                if not papers or next_offset is None:
+                    return
+                offset = next_offset
+        finally:
+            cancel.set()
+            prefetcher.shutdown(wait=False, cancel_futures=True)
+
+# =========================
+# SHARED INSTANCE
+# =========================
+_client = None
+_client_lock = threading.Lock()
+
+def get_client(interactive=False):
+    """
+    The process-wide client. interactive=True gives a view with fewer
+    retries and shorter backoff for requests a user is waiting on; it
+    shares the session and rate limiter.
+    """
+    # Created on first use so callers can load_dotenv() before it reads the env
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SemanticScholarClient(
+                api_key=os.getenv("SEMANTIC_SCHOLAR_API_KEY"),
+                base_url=os.getenv("S2_BASE_URL", DEFAULT_BASE_URL),
+                rate=float(os.getenv("S2_RATE_LIMIT", 0)) or None
+            )
+    if interactive:
+        return _client.with_retries(INTERACTIVE_MAX_RETRIES, INTERACTIVE_MAX_BACKOFF)
+    return _client
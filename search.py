@@ -8,18 +8,30 @@
 
 
 import os
-import json
 import time
-import requests
+import argparse
 from dotenv import load_dotenv
 import pymupdf4llm
 
+from pdf_cache import PdfCache, InvalidPdfError, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DEFAULT_MAX_PDF_BYTES
+from extraction_manifest import ExtractionManifest
+from md_sections import build_sections
+from s2_client import get_client
+from corpus_store import CorpusStore, DEFAULT_CORPUS_DIR
+from candidate_planner import CandidatePlanner
+from collection_journal import CollectionJournal
+from topic_batch import read_topics, collect_topics, DEFAULT_TOPIC_MAP_FILE
+import profiling
+from collector_pool import (
+    run_pipeline, worker_pools, worker_count,
+    DEFAULT_DOWNLOAD_WORKERS, DEFAULT_EXTRACT_WORKERS
+)
+
 # =========================
 # CONFIG
 # =========================
 load_dotenv()
 
-SEMANTIC_API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
 PAPERS_FOLDER = "papers"
 DATASET_FILE = "dataset.json"
 
@@ -27,43 +39,51 @@ MAX_SUCCESSFUL_PAPERS = 10
 BATCH_SIZE = 50
 MAX_RETRIES = 3
 
+# Concurrent collection (set both to 1 for a one-at-a-time run)
+DOWNLOAD_WORKERS = worker_count("DOWNLOAD_WORKERS", DEFAULT_DOWNLOAD_WORKERS)
+EXTRACT_WORKERS = worker_count("EXTRACT_WORKERS", DEFAULT_EXTRACT_WORKERS)
+
 os.makedirs(PAPERS_FOLDER, exist_ok=True)
 
+# PDFs are cached by paperId + content hash and revalidated with ETag/Last-Modified
+PDF_CACHE = PdfCache(
+    os.getenv("PDF_CACHE_DIR", DEFAULT_CACHE_DIR),
+    int(os.getenv("PDF_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+    int(os.getenv("PDF_MAX_DOWNLOAD_MB", DEFAULT_MAX_PDF_BYTES // (1024 * 1024))) * 1024 * 1024
+)
+
+# Stored sections are reused for PDFs already extracted by this extractor version
+# (bump the suffix whenever extract_sections changes its output)
+EXTRACTOR_VERSION = f"pymupdf4llm-{pymupdf4llm.__version__}/sections-2"
+EXTRACTION_MANIFEST = ExtractionManifest(".extract_cache", EXTRACTOR_VERSION)
+
+# Every run is appended to the corpus store; dataset.json is exported from it
+CORPUS = CorpusStore(os.getenv("CORPUS_DIR", DEFAULT_CORPUS_DIR))
+
 # =========================
 # SEMANTIC SCHOLAR REST API
 # =========================
+# Pooled session + rate limiting + 429 backoff live in the shared client
+SEARCH_FIELDS = "title,authors,year,abstract,openAccessPdf,citationCount,externalIds"
+
 def search_semantic_scholar(query, limit=50, offset=0):
-    url = "https://api.semanticscholar.org/graph/v1/paper/search"
-    params = {
-        "query": query,
-        "limit": limit,
-        "offset": offset,
-        "fields": "title,authors,year,abstract,openAccessPdf,citationCount"
-    }
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
-    if SEMANTIC_API_KEY:
-        headers["x-api-key"] = SEMANTIC_API_KEY
-
-    response = requests.get(url, params=params, headers=headers, timeout=20)
-    response.raise_for_status()
-    return response.json().get("data", [])
+    return get_client().search(query, limit=limit, offset=offset, fields=SEARCH_FIELDS)
 
 # =========================
 # PDF DOWNLOAD
 # =========================
-def download_pdf(pdf_url, name_prefix):
+def pdf_path_for(name_prefix):
     safe_name = "".join(c if c.isalnum() or c in " _-" else "_" for c in name_prefix)[:80]
-    path = os.path.join(PAPERS_FOLDER, f"{safe_name}.pdf")
+    return os.path.join(PAPERS_FOLDER, f"{safe_name}.pdf")
+
+def download_pdf(pdf_url, name_prefix, paper_id=None):
+    path = pdf_path_for(name_prefix)
 
     try:
-        r = requests.get(pdf_url, stream=True, timeout=60, headers={"User-Agent": "Mozilla/5.0"})
-        if r.status_code == 200:
-            with open(path, "wb") as f:
-                for chunk in r.iter_content(8192):
-                    f.write(chunk)
-            return path
+        cached = PDF_CACHE.fetch(paper_id, pdf_url, timeout=60, headers={"User-Agent": "Mozilla/5.0"})
+        return PDF_CACHE.materialize(cached, path)
+    except InvalidPdfError as e:
+        print(f"⚠ Rejected: {e}")
     except:
         pass
 
@@ -74,73 +94,133 @@ def download_pdf(pdf_url, name_prefix):
 # =========================
 def extract_sections(pdf_path):
     try:
-        text = pymupdf4llm.to_markdown(pdf_path)
-        sections = {}
-        current = "Full Text"
-
-        for line in text.split("\n"):
-            line = line.strip()
-            if line.startswith(("# ", "## ", "### ")):
-                current = line.lstrip("# ").strip()
-            elif line:
-                sections.setdefault(current, "")
-                sections[current] += line + " "
-
-        return {k: v.strip() for k, v in sections.items()}
+        return build_sections(pdf_path)
     except:
         return {"error": "Extraction failed"}
 
+# =========================
+# PIPELINE STEPS
+# =========================
+def download_candidate(paper, idx):
+    print(f"📄 Trying: {paper.get('title', 'Untitled')}")
+    return download_pdf(paper["openAccessPdf"]["url"], f"_tmp_{idx}", paper.get("paperId"))
+
+def place_pdf(paper, tmp_path, n):
+    path = pdf_path_for(f"{n}_{paper.get('title', 'Untitled')}")
+    os.replace(tmp_path, path)
+    return path
+
 # =========================
 # MAIN COLLECTION LOGIC
 # =========================
-def collect_papers(topic):
+def accept_best(planner, collected, journal=None, pools=None, shared=None):
+    def accept(paper, pdf_path, sections):
+        collected.append({
+            "paperId": paper.get("paperId"),
+            "title": paper.get("title", "Untitled"),
+            "authors": [a["name"] for a in paper.get("authors", [])],
+            "year": paper.get("year"),
+            "abstract": paper.get("abstract") or "No abstract",
+            "citations": paper.get("citationCount", 0),
+            "pdf_file": os.path.basename(pdf_path),
+            "sections": sections
+        })
+        # Checkpoint: the paper is in the corpus before the journal points at it
+        if journal:
+            journal.record_paper(CORPUS.add_papers(collected[-1:])[0], paper)
+
+        print(f"✅ Added ({len(collected)}/{MAX_SUCCESSFUL_PAPERS})")
+
+    # Download the highest-scoring pooled candidates until the goal is met
+    while planner and len(collected) < MAX_SUCCESSFUL_PAPERS:
+        needed = MAX_SUCCESSFUL_PAPERS - len(collected)
+        candidates = planner.take(needed)
+
+        # Accepted for an earlier topic of this batch: no download or extraction
+        reused = [p for p in candidates if shared and p.get("paperId") in shared]
+        for paper in reused:
+            collected.append(CORPUS.get(paper["paperId"]))
+            if journal:
+                journal.record_paper(paper["paperId"], paper)
+            print(f"♻ Reused from an earlier topic ({len(collected)}/{MAX_SUCCESSFUL_PAPERS})")
+
+        run_pipeline(
+            [p for p in candidates if p not in reused],
+            download_candidate,
+            place_pdf,
+            extract_sections,
+            needed=needed - len(reused),
+            download_workers=DOWNLOAD_WORKERS,
+            extract_workers=EXTRACT_WORKERS,
+            manifest=EXTRACTION_MANIFEST,
+            on_accept=accept,
+            pools=pools
+        )
+        if journal:
+            # An interrupted download keeps its partial: leave it untried so a resume finishes it
+            journal.record_tried([
+                p for p in candidates
+                if not PDF_CACHE.has_partial(p.get("paperId"), p["openAccessPdf"]["url"])
+            ])
+
+def collect_papers(topic, journal=None, pools=None, shared=None):
+    """
+    Collect up to MAX_SUCCESSFUL_PAPERS papers for topic. With a
+    CollectionJournal every page and accepted paper is checkpointed (papers
+    go straight into the corpus), and an interrupted run picks up from it.
+    Batch runs pass shared worker pools and the corpus ids already
+    collected for other topics (see topic_batch.collect_topics).
+    """
     print(f"\n🔍 Searching for: {topic}")
     print(f"🎯 Goal: {MAX_SUCCESSFUL_PAPERS} open-access PDFs\n")
 
     collected = []
+    # Open-access, de-duplicated candidates from every page, best first
+    planner = CandidatePlanner(topic)
     offset = 0
     retries = 0
 
+    if journal:
+        collected = list(CORPUS.iter_papers(journal.paper_ids))
+        if journal.done:
+            print(f"↻ Already collected ({len(collected)} papers); run with --fresh to start over")
+            return collected
+        journal.restore(planner)
+        offset = journal.next_offset
+        if journal.resumed:
+            print(f"↻ Resuming: {len(collected)} papers collected, search continues at offset {offset}\n")
+            if planner.ready(MAX_SUCCESSFUL_PAPERS - len(collected)):
+                accept_best(planner, collected, journal, pools, shared)
+
     while len(collected) < MAX_SUCCESSFUL_PAPERS and retries < MAX_RETRIES:
         try:
-            print(f"Fetching papers (offset={offset})...")
-            results = search_semantic_scholar(topic, limit=BATCH_SIZE, offset=offset)
+            # The next page is prefetched while this one is downloaded and extracted,
+            # until the goal is met
+            pages = get_client().iter_search_pages(
+                topic, BATCH_SIZE, offset, SEARCH_FIELDS,
+                want_more=lambda: len(collected) < MAX_SUCCESSFUL_PAPERS
+            )
+            for page_offset, results in pages:
+                print(f"Fetching papers (offset={page_offset})...")
+
+                if not results:
+                    print("No more results found.")
+                    break
 
-            if not results:
-                print("No more results found.")
-                break
+                planner.add(results, page_offset)
+                # Resume point if a later page fails (or the process dies)
+                offset = page_offset + BATCH_SIZE
+                if journal:
+                    journal.record_page(page_offset, results, offset)
 
-            for paper in results:
+                # Pool a few pages' worth before downloading, so the best are tried first
+                if planner.ready(MAX_SUCCESSFUL_PAPERS - len(collected)):
+                    accept_best(planner, collected, journal, pools, shared)
                 if len(collected) >= MAX_SUCCESSFUL_PAPERS:
                     break
-
-                pdf_info = paper.get("openAccessPdf")
-                if not pdf_info or "url" not in pdf_info:
-                    continue
-
-                title = paper.get("title", "Untitled")
-                print(f"📄 Trying: {title}")
-
-                pdf_path = download_pdf(pdf_info["url"], f"{len(collected)+1}_{title}")
-                if not pdf_path:
-                    continue
-
-                sections = extract_sections(pdf_path)
-
-                collected.append({
-                    "title": title,
-                    "authors": [a["name"] for a in paper.get("authors", [])],
-                    "year": paper.get("year"),
-                    "abstract": paper.get("abstract") or "No abstract",
-                    "citations": paper.get("citationCount", 0),
-                    "pdf_file": os.path.basename(pdf_path),
-                    "sections": sections
-                })
-
-                print(f"✅ Added ({len(collected)}/{MAX_SUCCESSFUL_PAPERS})")
-
-            offset += BATCH_SIZE
-            time.sleep(2)
+            # Abandon a prefetch the loop no longer needs
+            pages.close()
+            break
 
         except Exception as e:
             retries += 1
@@ -148,28 +228,69 @@ def collect_papers(topic):
             print("⏳ Waiting 5 seconds...\n")
             time.sleep(5)
 
+    # Search exhausted, or given up after MAX_RETRIES failed pages: try whatever is left in the pool
+    accept_best(planner, collected, journal, pools, shared)
+    if journal:
+        journal.record_done()
+    print(f"ℹ Skipped {planner.duplicates} duplicates and {planner.closed_access} papers without an open PDF")
     return collected
 
 # =========================
 # ENTRY POINT
 # =========================
 if __name__ == "__main__":
+    # --profile[=trace.json] reports search / download / extract timings on exit
+    profiling.start_from_argv()
+    parser = argparse.ArgumentParser(description="Collect open-access papers with their sections")
+    parser.add_argument("--topics", metavar="FILE",
+                        help="collect every topic in FILE (one per line) in a single run")
+    parser.add_argument("--fresh", action="store_true",
+                        help="ignore earlier journals and collect the topic(s) from scratch")
+    args = parser.parse_args()
     print("\n🧠 AI Paper Reviewer – Smart Open-Access Collector\n")
 
-    topic = input("Enter research topic: ").strip()
-    if not topic:
-        topic = "attention is all you need"
+    if args.topics:
+        # One process for all topics: worker pools, S2 rate limiter and caches are shared
+        with worker_pools(DOWNLOAD_WORKERS, EXTRACT_WORKERS) as pools:
+            topic_map = collect_topics(
+                read_topics(args.topics),
+                lambda topic, journal, shared: collect_papers(topic, journal, pools, shared),
+                CORPUS, DATASET_FILE, fresh=args.fresh
+            )
+        papers = list(CORPUS.iter_papers(list(dict.fromkeys(
+            pid for ids in topic_map.values() for pid in ids
+        ))))
+    else:
+        topic = input("Enter research topic: ").strip()
+        if not topic:
+            topic = "attention is all you need"
 
-    papers = collect_papers(topic)
+        # Progress is journaled per paper: re-running the same topic resumes
+        journal = CollectionJournal(topic, fresh=args.fresh)
+        papers = collect_papers(topic, journal)
+        if papers:
+            CORPUS.export_json(DATASET_FILE, journal.paper_ids)
 
     if not papers:
         print("\n❌ No downloadable open-access papers found.")
     else:
-        with open(DATASET_FILE, "w", encoding="utf-8") as f:
-            json.dump(papers, f, indent=2, ensure_ascii=False)
-
         print("\n🎉 SUCCESS!")
+        if args.topics:
+            print(f"• Topics: {len(topic_map)} (topic → papers in {DEFAULT_TOPIC_MAP_FILE})")
         print(f"• Papers collected: {len(papers)}")
         print(f"• PDFs saved in: {PAPERS_FOLDER}/")
+        print(f"• PDF cache: {PDF_CACHE.hits} hits, {PDF_CACHE.downloads} downloads")
+        print(f"• Extraction reused: {EXTRACTION_MANIFEST.hits}/{len(papers)}")
+        print(f"• Corpus: {len(CORPUS)} papers in {CORPUS.corpus_dir}/")
         print(f"• Dataset saved: {DATASET_FILE}")
+
+        # Only new or changed papers are embedded into the local vector index
+        try:
+            from vector_index import SectionIndex
+            print(f"• Vector index: {SectionIndex().index_papers(papers)} papers embedded")
+        except ImportError:
+            print("• Vector index skipped (chromadb / sentence-transformers not installed)")
+        except Exception as e:
+            # e.g. the embedding model could not be downloaded; the dataset is already saved
+            print(f"• Vector index failed: {e}")
         print("\n➡ Ready for Milestone 3 (LLM Analysis)")
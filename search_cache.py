@@ -0,0 +1,96 @@
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_DB_PATH = ".search_cache.sqlite"
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 500
+
+# =========================
+# HELPERS
+# =========================
+def normalize_topic(topic):
+    return " ".join(topic.lower().split())
+
+def normalize_fields(fields):
+    return ",".join(sorted({f.strip() for f in fields.split(",") if f.strip()}))
+
+# =========================
+# QUERY RESULT CACHE
+# =========================
+class SearchCache:
+    """
+    Persistent (sqlite) cache of Semantic Scholar search results keyed by
+    normalised topic and field list. A stored result with a larger limit
+    answers any smaller request, and so does a result that came back short
+    (there are no more papers to fetch). Entries expire after `ttl` seconds
+    and the least recently used ones are dropped beyond `max_entries`.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS searches (
+                    topic TEXT NOT NULL,
+                    fields TEXT NOT NULL,
+                    lim INTEGER NOT NULL,
+                    results TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL,
+                    PRIMARY KEY (topic, fields)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across Streamlit threads
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, topic, fields, limit):
+        key = (normalize_topic(topic), normalize_fields(fields))
+        now = time.time()
+
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT lim, results FROM searches WHERE topic = ? AND fields = ? AND created > ?",
+                (*key, now - self.ttl)
+            ).fetchone()
+            if not row:
+                return None
+
+            stored_limit, payload = row
+            results = json.loads(payload)
+            if stored_limit < limit and len(results) >= stored_limit:
+                return None
+
+            db.execute("UPDATE searches SET accessed = ? WHERE topic = ? AND fields = ?", (now, *key))
+        return results[:limit]
+
+    def put(self, topic, fields, limit, results):
+        key = (normalize_topic(topic), normalize_fields(fields))
+        now = time.time()
+
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, limit, json.dumps(results, ensure_ascii=False), now, now)
+            )
+            db.execute("DELETE FROM searches WHERE created <= ?", (now - self.ttl,))
+            db.execute("""
+                DELETE FROM searches WHERE rowid NOT IN (
+                    SELECT rowid FROM searches ORDER BY accessed DESC LIMIT ?
+                )
+            """, (self.max_entries,))
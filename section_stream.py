@@ -0,0 +1,65 @@
+import re
+
+# =========================
+# INCREMENTAL SECTION PARSER
+# =========================
+class IncrementalSectionParser:
+    """
+    Splits streamed model output into named sections as it arrives.
+
+    Only complete lines are classified; a line counts as a heading when it
+    is one of `titles` (ignoring markdown marks), optionally followed by a
+    parenthesised note or by ":" and inline text. Text before the first
+    heading belongs to the first title. The unfinished last line is shown
+    in the current section until its newline arrives.
+    """
+
+    def __init__(self, titles):
+        self.titles = list(titles)
+        self.current = self.titles[0]
+        self.lines = {title: [] for title in self.titles}
+        self.partial = ""
+        self.seen = set()
+
+        names = "|".join(re.escape(t) for t in self.titles)
+        self.heading_re = re.compile(
+            rf"^({names})\s*(?:\([^)]*\))?\s*(?::\s*(.*))?$", re.IGNORECASE
+        )
+        self.canonical = {t.lower(): t for t in self.titles}
+
+    def _take_line(self, line):
+        cleaned = re.sub(r"[#*_]+", "", line).strip()
+        match = self.heading_re.match(cleaned)
+        if match:
+            self.current = self.canonical[match.group(1).lower()]
+            self.seen.add(self.current)
+            if match.group(2):
+                self.lines[self.current].append(match.group(2))
+        else:
+            self.lines[self.current].append(line)
+
+    def feed(self, chunk):
+        """Add streamed text; returns the titles whose content changed."""
+        changed = {self.current}
+        *complete, self.partial = (self.partial + chunk).split("\n")
+        for line in complete:
+            self._take_line(line)
+            changed.add(self.current)
+        return changed
+
+    def finish(self):
+        changed = {self.current}
+        if self.partial:
+            self._take_line(self.partial)
+            self.partial = ""
+            changed.add(self.current)
+        return changed
+
+    def text(self, title):
+        lines = self.lines[title]
+        if title == self.current and self.partial:
+            lines = lines + [self.partial]
+        return "\n".join(lines).strip()
+
+    def missing(self):
+        return [t for t in self.titles if t not in self.seen and not self.text(t)]
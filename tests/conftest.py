@@ -0,0 +1,67 @@
+"""
+Unit tests for the shared helpers and milestone modules.
+
+    python -m pytest tests
+
+Everything runs offline against the bundled papers/*.pdf; modules that
+create folders on import are loaded inside a temporary working directory.
+"""
+import os
+import sys
+import glob
+import importlib.util
+
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODULE_DIR = os.path.join(ROOT_DIR, "ai-research-paper-reviewer", "app", "module")
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# =========================
+# HELPERS
+# =========================
+def load_module(name, path):
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+# =========================
+# FIXTURES
+# =========================
+@pytest.fixture(scope="session")
+def workdir(tmp_path_factory):
+    # Modules create their output / cache folders in the working directory on import
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("work"))
+    yield os.getcwd()
+    os.chdir(previous)
+
+@pytest.fixture(scope="session")
+def pdf_paths():
+    paths = sorted(glob.glob(os.path.join(ROOT_DIR, "papers", "*.pdf")))
+    if not paths:
+        pytest.skip("no bundled PDFs in papers/")
+    return paths
+
+@pytest.fixture(scope="session")
+def extraction(workdir):
+    return load_module(
+        "extraction_analysis",
+        os.path.join(MODULE_DIR, "milestone2__extraction_analysis", "extraction_analysis.py")
+    )
+
+@pytest.fixture(scope="session")
+def collector(workdir):
+    return load_module("search", os.path.join(ROOT_DIR, "search.py"))
+
+@pytest.fixture(scope="session")
+def drafting(workdir):
+    return load_module(
+        "drafting",
+        os.path.join(MODULE_DIR, "milestone3_drafting", "drafting.py")
+    )
@@ -0,0 +1,24 @@
+from collection_journal import CollectionJournal
+
+# =========================
+# RESUME / FRESH START
+# =========================
+def test_done_journal_is_replayed(tmp_path):
+    journal = CollectionJournal("Graph neural networks", str(tmp_path))
+    journal.record_paper("p1", {"paperId": "p1"})
+    journal.record_done()
+    journal.close()
+
+    journal = CollectionJournal("graph neural networks ", str(tmp_path))
+    assert journal.done and journal.paper_ids == ["p1"]
+    journal.close()
+
+def test_fresh_discards_earlier_journal(tmp_path):
+    journal = CollectionJournal("Graph neural networks", str(tmp_path))
+    journal.record_paper("p1", {"paperId": "p1"})
+    journal.record_done()
+    journal.close()
+
+    journal = CollectionJournal("Graph neural networks", str(tmp_path), fresh=True)
+    assert not journal.done and not journal.resumed
+    journal.close()
@@ -0,0 +1,33 @@
+import os
+
+from collector_pool import run_pipeline, worker_pools
+
+# =========================
+# HELPERS
+# =========================
+# Module-level so the extraction processes can unpickle them
+def download(item, idx):
+    return item
+
+def place(item, tmp_path, n):
+    return tmp_path
+
+def extract(path):
+    if path == "crash.pdf":
+        os._exit(1)  # a worker dying mid-extraction, like a segfault in the PDF library
+    return {"Body": path}
+
+# =========================
+# BROKEN EXTRACTION POOL
+# =========================
+def test_crashed_worker_rebuilds_extraction_pool():
+    candidates = ["a.pdf", "crash.pdf", "b.pdf"]
+    with worker_pools(2, 2) as pools:
+        collected = run_pipeline(candidates, download, place, extract, needed=3, pools=pools)
+        assert [sections for _, _, sections in collected] == [
+            {"Body": "a.pdf"}, {"error": "Extraction worker crashed"}, {"Body": "b.pdf"}
+        ]
+
+        # The rebuilt pool keeps serving later runs of the batch
+        collected = run_pipeline(["c.pdf"], download, place, extract, needed=1, pools=pools)
+        assert collected[0][2] == {"Body": "c.pdf"}
@@ -0,0 +1,51 @@
+import os
+
+import corpus_store
+from corpus_store import CorpusStore
+
+def paper(i):
+    return {"paperId": f"p{i}", "title": f"Paper {i}", "sections": {"Body": f"text {i}"}}
+
+# =========================
+# COMPACTION
+# =========================
+def test_open_keeps_newer_generations(tmp_path):
+    store = CorpusStore(str(tmp_path))
+    store.add_papers([paper(1), paper(2)])
+    store.add_papers([paper(1)])
+    store.compact()
+    store.compact()
+    assert store.blob_path.endswith("sections.2.bin")
+
+    # A stale generation and another process's compact() in progress
+    (tmp_path / "sections.1.bin").write_bytes(b"stale")
+    (tmp_path / "sections.3.bin").write_bytes(b"in progress")
+    CorpusStore(str(tmp_path))
+
+    assert not (tmp_path / "sections.1.bin").exists()
+    assert (tmp_path / "sections.3.bin").exists()
+
+def test_other_instance_follows_compaction(tmp_path):
+    writer = CorpusStore(str(tmp_path))
+    reader = CorpusStore(str(tmp_path))
+    writer.add_papers([paper(1), paper(2)])
+    assert reader.sections("p2") == {"Body": "text 2"}
+
+    writer.add_papers([paper(1)])
+    writer.compact()
+
+    assert reader.sections("p2") == {"Body": "text 2"}
+    reader.add_papers([paper(3)])
+    assert [p["sections"]["Body"] for p in writer.iter_papers()] == ["text 1", "text 2", "text 3"]
+    assert os.path.basename(reader.blob_path) == "sections.1.bin"
+
+# =========================
+# READING
+# =========================
+def test_iter_papers_queries_ids_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_store, "ID_CHUNK", 2)
+    store = CorpusStore(str(tmp_path))
+    store.add_papers([paper(i) for i in range(5)])
+
+    ids = ["p4", "missing", "p0", "p3", "p1"]
+    assert [p["paperId"] for p in store.iter_papers(ids)] == ["p4", "p0", "p3", "p1"]
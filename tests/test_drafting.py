@@ -0,0 +1,41 @@
+import pytest
+
+# =========================
+# HELPERS
+# =========================
+class WordTokenizer:
+    """One token per word, plus an EOS."""
+
+    def __call__(self, texts, add_special_tokens=True):
+        eos = [0] if add_special_tokens else []
+        if isinstance(texts, str):
+            return {"input_ids": [1] * len(texts.split()) + eos}
+        return {"input_ids": [[1] * len(t.split()) + eos for t in texts]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 1
+
+def summary_prompt(text):
+    return f"Summarize: {text}"
+
+def final_prompt(text):
+    return f"Write the abstract: {text}"
+
+# =========================
+# CACHED RERUN
+# =========================
+def test_cached_condense_skips_tokenizer(drafting, monkeypatch):
+    text = " ".join(f"Finding {i} holds." for i in range(300))
+
+    monkeypatch.setattr(drafting, "get_tokenizer", lambda name: WordTokenizer())
+    monkeypatch.setattr(drafting, "get_generator", lambda: (
+        lambda batch, batch_size: [{"generated_text": "Short summary."} for _ in batch]
+    ))
+    first = drafting.condense(text, summary_prompt, final_prompt)
+
+    def no_model(*args):
+        pytest.fail("a cached rerun must not load the tokenizer or the model")
+
+    monkeypatch.setattr(drafting, "get_tokenizer", no_model)
+    monkeypatch.setattr(drafting, "get_generator", no_model)
+    assert drafting.condense(text, summary_prompt, final_prompt) == first
@@ -0,0 +1,34 @@
+import pytest
+
+# =========================
+# SENTENCE SPLITTING
+# =========================
+def test_split_keeps_abbreviations(extraction):
+    text = "As shown by Smith et al. in Fig. 2, accuracy rose. We then compare e.g. BERT."
+    assert extraction.split_sentences(text) == [
+        "As shown by Smith et al. in Fig. 2, accuracy rose.",
+        "We then compare e.g. BERT."
+    ]
+
+def test_split_after_single_capital(extraction):
+    text = "Model A is faster than model B. We therefore use model A."
+    assert extraction.split_sentences(text) == [
+        "Model A is faster than model B.",
+        "We therefore use model A."
+    ]
+
+# =========================
+# CUE SCORING
+# =========================
+@pytest.mark.parametrize("spelling", [
+    "state-of-the-art", "state of the art", "state-of-the art", "state of-the-art", "State-Of The-Art"
+])
+def test_mixed_cue_spellings_score_the_same(extraction, spelling):
+    sentence = f"Our model is {spelling} on the GLUE benchmark suite."
+    assert extraction.score_sentence(sentence) == extraction.CUE_WEIGHTS["state of the art"]
+
+def test_key_findings_with_mixed_spelling(extraction):
+    text = ("Our model is state-of-the art on GLUE and improves accuracy by 3.5%. "
+            "The dataset has many documents in several languages.")
+    findings = extraction.extract_key_findings(text)
+    assert findings == ["Our model is state-of-the art on GLUE and improves accuracy by 3.5%"]
@@ -0,0 +1,82 @@
+import pytest
+import pymupdf
+import pymupdf4llm
+from pymupdf4llm.helpers import pymupdf_rag
+
+import md_sections
+
+# =========================
+# PAGE STREAMING
+# =========================
+def test_pages_are_converted_one_at_a_time(monkeypatch, pdf_paths):
+    if pymupdf4llm._use_layout:
+        from pymupdf4llm.helpers import document_layout
+        module, name = document_layout, "parse_document"
+    else:
+        module, name = pymupdf_rag, "to_markdown"
+
+    converted = []
+    original = getattr(module, name)
+
+    def counting(doc, *args, pages=None, **kwargs):
+        assert len(pages) == 1
+        converted.append(pages[0])
+        return original(doc, *args, pages=pages, **kwargs)
+
+    monkeypatch.setattr(module, name, counting)
+
+    with pymupdf.open(pdf_paths[0]) as doc:
+        page_count = doc.page_count
+
+    pages = md_sections.iter_markdown_pages(pdf_paths[0])
+    next(pages)
+    assert converted == [0]
+    next(pages)
+    assert converted == [0, 1]
+
+    assert sum(1 for _ in pages) == page_count - 2
+    assert converted == list(range(page_count))
+
+# =========================
+# HEADING LEVELS
+# =========================
+def test_placeholder_levels_follow_document_ranking():
+    placeholder = "#" * md_sections.PLACEHOLDER_LEVEL
+    markdown = f"{placeholder} Title\n\ntext\n\n{placeholder}# Method\n\nmore\n"
+    # Sizes of the page's headings, ranked against sizes from the whole document
+    resolved = md_sections.resolve_headings(markdown, [18, 11], [18, 14, 11])
+    assert resolved == "# Title\n\ntext\n\n### Method\n\nmore\n"
+
+def test_streamed_sections_nest_under_headings(pdf_paths):
+    sections = md_sections.build_sections(pdf_paths[0])
+    assert any(md_sections.PATH_SEPARATOR in name for name in sections)
+
+# =========================
+# PUBLIC API FALLBACK
+# =========================
+def test_missing_internals_fall_back_to_public_api(monkeypatch, pdf_paths):
+    if not pymupdf4llm._use_layout:
+        pytest.skip("layout engine not installed")
+    # As if a release moved document_layout.parse_document
+    monkeypatch.setattr(md_sections, "layout_parser", lambda: None)
+    calls = []
+    original = pymupdf4llm.to_markdown
+
+    def public(doc, *args, **kwargs):
+        calls.append(kwargs.get("page_chunks"))
+        return original(doc, *args, **kwargs)
+
+    monkeypatch.setattr(pymupdf4llm, "to_markdown", public)
+    sections = md_sections.build_sections(pdf_paths[0])
+    assert calls == [True]
+    assert sections
+
+def test_changed_internals_fall_back_to_public_api(monkeypatch, pdf_paths):
+    if not pymupdf4llm._use_layout:
+        pytest.skip("layout engine not installed")
+
+    def changed(*args, **kwargs):
+        raise AttributeError("'Box' object has no attribute 'header_level'")
+
+    monkeypatch.setattr(md_sections, "layout_parser", lambda: changed)
+    assert md_sections.build_sections(pdf_paths[0])
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+
+from pdf_cache import PdfCache, PARTIAL_MAX_AGE
+
+PDF = b"%PDF-1.7\n" + b"x" * 4000 + b"\n%%EOF\n"
+URL = "https://example.org/paper.pdf"
+
+# =========================
+# HELPERS
+# =========================
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = {"Content-Type": "application/pdf", **(headers or {})}
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def close(self):
+        pass
+
+class FakeSession:
+    """Answers from a list of responses and records the request headers."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, stream=False, timeout=None, headers=None):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+def leave_partial(cache, key, data, etag='"v1"'):
+    with open(cache.partial_path(key), "wb") as f:
+        f.write(data)
+    with open(cache.partial_path(key) + ".json", "w", encoding="utf-8") as f:
+        json.dump({"url": URL, "etag": etag, "last_modified": None}, f)
+
+# =========================
+# RANGE RESUME
+# =========================
+def test_resume_appends_matching_range(tmp_path):
+    cache = PdfCache(str(tmp_path))
+    leave_partial(cache, "p1", PDF[:1000])
+    session = FakeSession(FakeResponse(206, PDF[1000:], {"Content-Range": f"bytes 1000-{len(PDF) - 1}/{len(PDF)}"}))
+
+    path = cache.fetch("p1", URL, session=session)
+
+    assert session.requests[0]["Range"] == "bytes=1000-"
+    with open(path, "rb") as f:
+        assert f.read() == PDF
+    assert not cache.has_partial("p1")
+
+def test_mismatched_range_downloads_whole_file(tmp_path):
+    cache = PdfCache(str(tmp_path))
+    leave_partial(cache, "p1", PDF[:1000])
+    session = FakeSession(
+        FakeResponse(206, PDF[500:], {"Content-Range": f"bytes 500-{len(PDF) - 1}/{len(PDF)}"}),
+        FakeResponse(200, PDF)
+    )
+
+    path = cache.fetch("p1", URL, session=session)
+
+    assert "Range" not in session.requests[1]
+    with open(path, "rb") as f:
+        assert f.read() == PDF
+
+def test_416_retries_once_without_range(tmp_path):
+    cache = PdfCache(str(tmp_path))
+    leave_partial(cache, "p1", PDF[:1000])
+    session = FakeSession(FakeResponse(416), FakeResponse(200, PDF))
+
+    path = cache.fetch("p1", URL, session=session)
+
+    assert len(session.requests) == 2
+    assert "Range" not in session.requests[1] and "If-Range" not in session.requests[1]
+    with open(path, "rb") as f:
+        assert f.read() == PDF
+
+# =========================
+# EVICTION
+# =========================
+def test_partials_count_towards_max_bytes(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=len(PDF) + 500)
+    leave_partial(cache, "old", PDF[:1000])
+
+    cache.fetch("p1", URL, session=FakeSession(FakeResponse(200, PDF)))
+
+    assert not cache.has_partial("old")
+    assert not os.path.exists(cache.partial_path("old") + ".json")
+
+def test_stale_partials_expire(tmp_path):
+    cache = PdfCache(str(tmp_path))
+    leave_partial(cache, "stale", PDF[:1000])
+    leave_partial(cache, "recent", PDF[:1000])
+    old = time.time() - PARTIAL_MAX_AGE - 60
+    os.utime(cache.partial_path("stale"), (old, old))
+
+    cache.fetch("p1", URL, session=FakeSession(FakeResponse(200, PDF)))
+
+    assert not cache.has_partial("stale")
+    assert cache.has_partial("recent")
@@ -0,0 +1,120 @@
+import time
+import threading
+
+import pytest
+
+import s2_client
+from s2_client import SemanticScholarClient
+
+# =========================
+# HELPERS
+# =========================
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload or {}
+        self.headers = {}
+        self.content = b"{}"
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+class FakeSession:
+    def __init__(self, respond):
+        self.respond = respond
+        self.offsets = []
+
+    def get(self, url, params=None, timeout=None):
+        self.offsets.append(params.get("offset"))
+        return self.respond(params)
+
+def client_with(respond, **kwargs):
+    client = SemanticScholarClient(rate=1e9, **kwargs)
+    client.session = FakeSession(respond)
+    return client
+
+# =========================
+# PAGING
+# =========================
+def next_page(params):
+    offset = params["offset"]
+    return FakeResponse(200, {"data": [{"paperId": str(offset)}], "next": offset + 1})
+
+def test_next_page_is_prefetched_while_caller_works():
+    client = client_with(next_page)
+    requested = threading.Event()
+
+    def respond(params):
+        if params["offset"] == 1:
+            requested.set()
+        return next_page(params)
+
+    client.session.respond = respond
+    pages = client.iter_search_pages("transformers", page_size=1)
+
+    assert next(pages) == (0, [{"paperId": "0"}])
+    # Page 1 goes out while the caller is still working on page 0
+    assert requested.wait(5)
+    assert next(pages) == (1, [{"paperId": "1"}])
+    pages.close()
+
+def test_no_prefetch_once_goal_is_met():
+    client = client_with(next_page)
+    pages = client.iter_search_pages("transformers", page_size=1, want_more=lambda: False)
+
+    assert next(pages) == (0, [{"paperId": "0"}])
+    time.sleep(0.1)
+    assert client.session.offsets == [0]
+    # A caller that asks anyway still gets the page
+    assert next(pages) == (1, [{"paperId": "1"}])
+    pages.close()
+
+def test_close_abandons_inflight_prefetch():
+    client = client_with(next_page)
+    inflight, release = threading.Event(), threading.Event()
+
+    def respond(params):
+        if params["offset"] == 1:
+            inflight.set()
+            release.wait(5)
+            return FakeResponse(429)
+        return next_page(params)
+
+    client.session.respond = respond
+    pages = client.iter_search_pages("transformers", page_size=1)
+    next(pages)
+    assert inflight.wait(5)
+
+    started = time.monotonic()
+    pages.close()
+    assert time.monotonic() - started < 1
+
+    # The abandoned request is not retried once it returns
+    release.set()
+    time.sleep(0.2)
+    assert client.session.offsets == [0, 1]
+
+def test_paging_stops_without_next():
+    client = client_with(lambda params: FakeResponse(200, {"data": [{"paperId": "a"}]}))
+    assert [offset for offset, _ in client.iter_search_pages("transformers")] == [0]
+
+# =========================
+# RETRY POLICY
+# =========================
+def test_interactive_client_retries_less(monkeypatch):
+    monkeypatch.setattr(s2_client.time, "sleep", lambda seconds: None)
+    client = client_with(lambda params: FakeResponse(429))
+    monkeypatch.setattr(s2_client, "_client", client)
+
+    interactive = s2_client.get_client(interactive=True)
+    assert interactive.limiter is client.limiter
+    assert interactive.max_backoff == s2_client.INTERACTIVE_MAX_BACKOFF
+
+    with pytest.raises(RuntimeError):
+        interactive.search("transformers")
+    assert len(client.session.offsets) == s2_client.INTERACTIVE_MAX_RETRIES + 1
+    assert client.max_retries == s2_client.MAX_RETRIES
@@ -0,0 +1,31 @@
+# =========================
+# FAILING SEARCH PAGES
+# =========================
+class FailingSearch:
+    """Page 0 has a few open-access papers; every later page fails."""
+
+    def __init__(self, papers):
+        self.papers = papers
+
+    def iter_search_pages(self, query, page_size=50, offset=0, fields=None, want_more=None):
+        if offset == 0:
+            yield 0, self.papers
+        raise RuntimeError("HTTP 400")
+
+def test_pooled_candidates_are_tried_when_search_fails(collector, monkeypatch):
+    papers = [
+        {"paperId": f"p{i}", "title": f"Paper {i}", "openAccessPdf": {"url": f"https://example.org/{i}.pdf"}}
+        for i in range(5)
+    ]
+    tried = []
+
+    def run_pipeline(candidates, *args, **kwargs):
+        tried.extend(candidates)
+        return []
+
+    monkeypatch.setattr(collector, "get_client", lambda: FailingSearch(papers))
+    monkeypatch.setattr(collector, "run_pipeline", run_pipeline)
+    monkeypatch.setattr(collector.time, "sleep", lambda seconds: None)
+
+    assert collector.collect_papers("transformers") == []
+    assert sorted(p["paperId"] for p in tried) == [p["paperId"] for p in papers]
@@ -0,0 +1,63 @@
+import text_generation
+from text_generation import map_reduce
+
+# =========================
+# HELPERS
+# =========================
+class WordTokenizer:
+    """One token per word, plus an EOS like flan-t5's."""
+
+    def __call__(self, texts, add_special_tokens=True):
+        eos = [0] if add_special_tokens else []
+        if isinstance(texts, str):
+            return {"input_ids": [hash(w) for w in texts.split()] + eos}
+        return {"input_ids": [[hash(w) for w in t.split()] + eos for t in texts]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 1
+
+    def decode(self, ids, skip_special_tokens=False):
+        words = {hash(w): w for w in self.vocabulary}
+        return " ".join(words[i] for i in ids)
+
+def tokenizer_for(text):
+    tokenizer = WordTokenizer()
+    tokenizer.vocabulary = text.split()
+    return tokenizer
+
+def map_prompt(chunk):
+    return f"Summarize: {chunk}"
+
+# =========================
+# TOKEN BUDGETS
+# =========================
+def test_chunks_leave_room_for_eos():
+    # Each sentence is exactly the room left next to "Summarize:" when EOS is not reserved
+    text = " ".join(" ".join(f"s{i}w{j}" for j in range(19)) + "." for i in range(3))
+    tokenizer = tokenizer_for(text)
+    prompts = []
+
+    def load_generator():
+        def generate(batch, batch_size):
+            prompts.extend(batch)
+            return [{"generated_text": "short."} for _ in batch]
+        return generate
+
+    map_reduce(load_generator, tokenizer, text, map_prompt, budget=10, max_input_tokens=20)
+
+    # Prompt plus EOS must fit the model input
+    assert prompts
+    assert all(len(tokenizer(p)["input_ids"]) <= 20 for p in prompts)
+
+def test_text_is_truncated_after_max_rounds(capsys):
+    text = " ".join(f"w{i}." for i in range(40))
+    tokenizer = tokenizer_for(text)
+
+    def load_generator():
+        # A model that never shortens its input
+        return lambda batch, batch_size: [{"generated_text": p.replace("Summarize: ", "")} for p in batch]
+
+    result = map_reduce(load_generator, tokenizer, text, map_prompt, budget=10, max_input_tokens=30)
+
+    assert len(tokenizer(result)["input_ids"]) <= 10
+    assert f"after {text_generation.MAX_REDUCE_ROUNDS} reduce rounds" in capsys.readouterr().out
@@ -0,0 +1,40 @@
+import json
+
+from corpus_store import CorpusStore
+from topic_batch import read_topics, collect_topics
+
+# =========================
+# TOPICS FILE
+# =========================
+def test_read_topics_keeps_hash_inside_topic(tmp_path):
+    path = tmp_path / "topics.txt"
+    path.write_text(
+        "# topics for the survey\n"
+        "C# static analysis\n"
+        "\n"
+        "   # indented comment\n"
+        "graph neural networks\n"
+        "Graph Neural Networks\n",
+        encoding="utf-8"
+    )
+    assert read_topics(str(path)) == ["C# static analysis", "graph neural networks"]
+
+# =========================
+# BATCH RUN
+# =========================
+def test_failed_topic_does_not_stop_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    corpus = CorpusStore(str(tmp_path / "corpus"))
+
+    def collect(topic, journal, shared):
+        if topic == "broken":
+            raise RuntimeError("search failed")
+        pid = corpus.add_papers([{"paperId": f"id-{topic}", "title": topic, "sections": {}}])[0]
+        journal.record_paper(pid, {"paperId": pid})
+
+    mapping = collect_topics(["first", "broken", "last"], collect, corpus,
+                             str(tmp_path / "dataset.json"), str(tmp_path / "map.json"))
+
+    assert list(mapping) == ["first", "last"]
+    with open(tmp_path / "dataset.json", encoding="utf-8") as f:
+        assert [p["title"] for p in json.load(f)] == ["first", "last"]
@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import hashlib
+
+from profiling import span, NULL_SPAN
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_BATCH_SIZE = 8
+MAX_REDUCE_ROUNDS = 5
+
+# Chunk boundaries: sentence ends and line breaks
+UNIT_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# =========================
+# ON-DISK GENERATION CACHE
+# =========================
+class GenerationCache:
+    """
+    Stores generated text per (model name, generation params, prompt hash),
+    one small JSON file per entry, so unchanged prompts are never re-run.
+    """
+
+    def __init__(self, cache_dir, model_name, params):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.params = dict(params)
+        self.hits = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, prompt):
+        key = json.dumps({
+            "model": self.model_name,
+            "params": self.params,
+            "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        }, sort_keys=True)
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, prompt):
+        try:
+            with open(self._path(prompt), "r", encoding="utf-8") as f:
+                text = json.load(f)["generated_text"]
+        except (OSError, ValueError, KeyError):
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, prompt, text):
+        path = self._path(prompt)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "generated_text": text}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+# =========================
+# BATCHED GENERATION
+# =========================
+def generate_batch(load_generator, prompts, cache=None, batch_size=DEFAULT_BATCH_SIZE, stage="generate"):
+    """
+    Generate text for every prompt, in order. Cached prompts are answered
+    from disk; the remaining unique prompts go to the pipeline as a single
+    batched call. load_generator() is only invoked when something is missing,
+    so a fully cached run never loads the model. The call is profiled as
+    a span named `stage`.
+    """
+    results = [cache.get(p) if cache else None for p in prompts]
+    missing = list(dict.fromkeys(p for p, r in zip(prompts, results) if r is None))
+
+    if missing:
+        generator = load_generator()
+        with span(stage, prompts=len(missing)) as timing:
+            outputs = generator(missing, batch_size=batch_size)
+
+            generated = {}
+            for prompt, output in zip(missing, outputs):
+                # text2text pipelines return [{...}] per prompt, or {...} when unwrapped
+                if isinstance(output, list):
+                    output = output[0]
+                generated[prompt] = output["generated_text"]
+                if cache:
+                    cache.put(prompt, generated[prompt])
+
+            # Local pipelines expose their tokenizer; remote generators do not
+            tokenizer = getattr(generator, "tokenizer", None)
+            if timing is not NULL_SPAN and tokenizer is not None:
+                timing.add(tokens=sum(count_tokens(tokenizer, missing + list(generated.values()))))
+
+        results = [r if r is not None else generated[p] for p, r in zip(prompts, results)]
+
+    return results
+
+# =========================
+# TOKEN-AWARE MAP-REDUCE
+# =========================
+def count_tokens(tokenizer, texts):
+    with span("tokenize") as timing:
+        counts = [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+        timing.add(tokens=sum(counts))
+    return counts
+
+def special_tokens(tokenizer):
+    """Tokens the tokenizer adds to every input (e.g. flan-t5's EOS)."""
+    return tokenizer.num_special_tokens_to_add(pair=False)
+
+def truncate_to_tokens(tokenizer, text, max_tokens):
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    return tokenizer.decode(ids[:max_tokens], skip_special_tokens=True)
+
+def chunk_by_tokens(tokenizer, text, max_tokens):
+    """
+    Pack sentences / lines of text into chunks of at most max_tokens model
+    tokens. A single unit longer than the budget is split on token ids.
+    """
+    units = [u.strip() for u in UNIT_SPLIT_RE.split(text) if u and u.strip()]
+    if not units:
+        return []
+
+    chunks, current, used = [], [], 0
+    for unit, n_tokens in zip(units, count_tokens(tokenizer, units)):
+        if n_tokens > max_tokens:
+            ids = tokenizer(unit, add_special_tokens=False)["input_ids"]
+            pieces = [
+                (tokenizer.decode(ids[i:i + max_tokens], skip_special_tokens=True),
+                 len(ids[i:i + max_tokens]))
+                for i in range(0, len(ids), max_tokens)
+            ]
+        else:
+            pieces = [(unit, n_tokens)]
+
+        for piece, size in pieces:
+            if current and used + size + 1 > max_tokens:  # +1 for the joining space
+                chunks.append(" ".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += size + 1
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def map_reduce(load_generator, tokenizer, text, map_prompt, budget, max_input_tokens,
+               cache=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Shrink text until it fits in `budget` tokens. Each round splits it into
+    chunks that fit map_prompt within max_input_tokens, summarises all chunks
+    in one batched call (map), and joins the partial summaries (reduce).
+    Rounds repeat, so very large inputs are reduced hierarchically.
+
+    Token counts exclude special tokens, so the ones the tokenizer adds to
+    every model input are reserved from both budgets. Text still over
+    budget after MAX_REDUCE_ROUNDS is truncated, with a warning.
+    """
+    reserved = special_tokens(tokenizer)
+    budget -= reserved
+    chunk_budget = max_input_tokens - reserved - count_tokens(tokenizer, [map_prompt("")])[0]
+
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if count_tokens(tokenizer, [text])[0] <= budget:
+            break
+        chunks = chunk_by_tokens(tokenizer, text, chunk_budget)
+        summaries = generate_batch(
+            load_generator, [map_prompt(c) for c in chunks], cache=cache, batch_size=batch_size
+        )
+        text = "\n".join(summaries)
+    else:
+        used = count_tokens(tokenizer, [text])[0]
+        if used > budget:
+            print(f"⚠ Still {used} tokens after {MAX_REDUCE_ROUNDS} reduce rounds; truncating to {budget}")
+            text = truncate_to_tokens(tokenizer, text, budget)
+
+    return text
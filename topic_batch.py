@@ -0,0 +1,63 @@
+import json
+
+from collection_journal import CollectionJournal
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_TOPIC_MAP_FILE = "topic_papers.json"
+
+# =========================
+# TOPICS FILE
+# =========================
+def read_topics(path):
+    """
+    One topic per line; blank lines, comment lines (starting with `#`) and
+    repeated topics are skipped. A `#` inside a topic is kept ("C# static
+    analysis").
+    """
+    topics = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            topic = line.strip()
+            if topic and not topic.startswith("#"):
+                topics.setdefault(topic.lower(), topic)
+    return list(topics.values())
+
+# =========================
+# BATCH RUN
+# =========================
+def collect_topics(topics, collect, corpus, dataset_file, map_file=DEFAULT_TOPIC_MAP_FILE, fresh=False):
+    """
+    Run collect(topic, journal, shared) for every topic in one process.
+
+    Each topic gets its own CollectionJournal, so an interrupted batch
+    resumes topic by topic. `shared` holds the corpus ids accepted for
+    earlier topics; collectors reuse those papers instead of downloading and
+    extracting them again. The topic -> paper ids mapping is written to
+    map_file after every topic, and every collected paper is exported once
+    to dataset_file. fresh=True starts every topic's journal over. A topic
+    that raises is reported and left out of the mapping; its journal keeps
+    what it collected, so re-running the batch resumes it. Returns the
+    mapping.
+    """
+    mapping = {}
+    shared = set()
+
+    for topic in topics:
+        journal = CollectionJournal(topic, fresh=fresh)
+        try:
+            collect(topic, journal, shared)
+        except Exception as e:
+            print(f"⚠ Topic failed: {topic}: {e}")
+            continue
+        finally:
+            journal.close()
+
+        mapping[topic] = list(journal.paper_ids)
+        shared.update(journal.paper_ids)
+        with open(map_file, "w", encoding="utf-8") as f:
+            json.dump(mapping, f, indent=2, ensure_ascii=False)
+
+    corpus.export_json(dataset_file, list(dict.fromkeys(pid for ids in mapping.values() for pid in ids)))
+    return mapping
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import hashlib
+
+from corpus_store import paper_id
+
+# =========================
+# CONFIG
+# =========================
+DEFAULT_PERSIST_DIR = ".chroma"
+DEFAULT_COLLECTION = "paper_sections"
+DEFAULT_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+CHUNK_WORDS = 200
+CHUNK_OVERLAP = 40
+EMBED_BATCH_SIZE = 64
+ADD_BATCH_SIZE = 1000  # Chroma caps the size of a single add()
+
+# =========================
+# CHUNKING
+# =========================
+def chunk_words(text, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, size - overlap)
+    return [" ".join(words[i:i + size]) for i in range(0, max(1, len(words) - overlap), step)]
+
+def paper_key(paper):
+    # S2 paperId when known: pdf_file names depend on acceptance order
+    return paper_id(paper)
+
+def paper_hash(paper):
+    payload = json.dumps(paper.get("sections", {}), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def import_chromadb():
+    try:
+        import chromadb
+    except RuntimeError:
+        # Chroma refuses an sqlite3 older than it supports; swap in
+        # pysqlite3-binary only in that case (ImportError if it is missing)
+        import pysqlite3
+        sys.modules["sqlite3"] = pysqlite3
+        for name in [m for m in sys.modules if m == "chromadb" or m.startswith("chromadb.")]:
+            del sys.modules[name]
+        import chromadb
+    return chromadb
+
+# =========================
+# SECTION INDEX
+# =========================
+class SectionIndex:
+    """
+    Persistent Chroma collection of embedded section chunks.
+
+    Papers are re-embedded only when their sections change: a small
+    manifest next to the collection stores a hash per paper. Embeddings
+    are computed on CPU in batches with sentence-transformers.
+    """
+
+    def __init__(self, persist_dir=DEFAULT_PERSIST_DIR, collection=DEFAULT_COLLECTION,
+                 model_name=DEFAULT_EMBED_MODEL):
+        chromadb = import_chromadb()
+        from sentence_transformers import SentenceTransformer
+
+        self.persist_dir = persist_dir
+        self.manifest_path = os.path.join(persist_dir, "indexed_papers.json")
+        self.client = chromadb.PersistentClient(path=persist_dir)
+        self.collection = self.client.get_or_create_collection(
+            collection, metadata={"hnsw:space": "cosine"}
+        )
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.indexed = json.load(f)
+        except (OSError, ValueError):
+            self.indexed = {}
+
+    def _embed(self, texts):
+        return self.model.encode(
+            texts, batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True, show_progress_bar=False
+        ).tolist()
+
+    def index_papers(self, papers):
+        """Add new or changed papers; returns how many were (re)embedded."""
+        ids, documents, metadatas = [], [], []
+        updated = 0
+        seen = set()
+
+        for paper in papers:
+            key = paper_key(paper)
+            digest = paper_hash(paper)
+            # A paper listed twice would add duplicate chunk ids to one batch
+            if key in seen or self.indexed.get(key) == digest:
+                continue
+            seen.add(key)
+
+            self.collection.delete(where={"paper": key})
+            for section, text in paper.get("sections", {}).items():
+                if not isinstance(text, str):
+                    continue
+                for i, chunk in enumerate(chunk_words(text)):
+                    ids.append(f"{key}::{section}::{i}")
+                    documents.append(chunk)
+                    metadatas.append({
+                        "paper": key,
+                        "title": paper.get("title") or key,
+                        "section": section
+                    })
+            self.indexed[key] = digest
+            updated += 1
+
+        for start in range(0, len(ids), ADD_BATCH_SIZE):
+            batch = slice(start, start + ADD_BATCH_SIZE)
+            self.collection.add(
+                ids=ids[batch],
+                documents=documents[batch],
+                metadatas=metadatas[batch],
+                embeddings=self._embed(documents[batch])
+            )
+
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.indexed, f, indent=2)
+        return updated
+
+    def query(self, text, k=5, where=None):
+        if self.collection.count() == 0:
+            return []
+
+        result = self.collection.query(
+            query_embeddings=self._embed([text]),
+            n_results=min(k, self.collection.count()),
+            where=where
+        )
+        return [
+            {"text": doc, "paper": meta["paper"], "title": meta["title"], "section": meta["section"],
+             "distance": dist}
+            for doc, meta, dist in zip(
+                result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+# =========================
+# ENTRY POINT
+# =========================
+if __name__ == "__main__":
+    # Source is a dataset.json export or a corpus store directory
+    source = sys.argv[1] if len(sys.argv) > 1 else "dataset.json"
+
+    if os.path.isdir(source):
+        from corpus_store import CorpusStore
+        papers = list(CorpusStore(source).iter_papers())
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            papers = json.load(f)
+
+    index = SectionIndex()
+    updated = index.index_papers(papers)
+    print(f"[INDEX] {updated} new or changed papers embedded, "
+          f"{index.collection.count()} chunks in '{DEFAULT_COLLECTION}'")